@@ -616,6 +616,8 @@ def readCommand( argv ):
                     help='Writes game histories to a file (named by the time they were played)', default=False)
   parser.add_option('--replay', default=None,
                     help='Replays a recorded game file.')
+  parser.add_option('--replayFrom', type='int', default=0,
+                    help=default('The move to start a replay from'))
   parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
                     help=default('How many episodes are training (suppresses output)'), default=0)
   parser.add_option('-c', '--catchExceptions', action='store_true', default=False,
@@ -655,6 +657,13 @@ def readCommand( argv ):
   # Special case: recorded games don't use the runGames method or args structure
   if options.replay != None:
     print 'Replaying recorded game %s.' % options.replay
+    import replay
+    if replay.isReplayFile(options.replay):
+      recorded = replay.loadReplay(options.replay, newReplayState)
+      agents = [Agent() for i in range(recorded.numAgents)]
+      replayGame(recorded.layout, agents, recorded.getActions(options.replayFrom), args['display'],
+                 recorded.info.get('length', options.time), recorded.stateAt(options.replayFrom))
+      sys.exit(0)
     import cPickle
     recorded = cPickle.load(open(options.replay))
     recorded['display'] = args['display']
@@ -751,10 +760,14 @@ def loadAgents(isRed, factory, textgraphics, cmdLineArgs):
   indices = [2*i + indexAddend for i in range(3)]
   return [foundFactory.getAgent(i) for i in indices]
 
-def replayGame( layout, agents, actions, display, length ):
+def replayGame( layout, agents, actions, display, length, state = None ):
+    """
+    Shows the (agentIndex, action) pairs of a recorded game being played,
+    from the start or, if state is given, from state.
+    """
     rules = CaptureRules()
     game = rules.newGame( layout, agents, display, length, False, False )
-    state = game.state
+    if state == None: state = game.state
     display.initialize(state.data)
 
     for action in actions:
@@ -767,6 +780,12 @@ def replayGame( layout, agents, actions, display, length ):
 
     display.finish()
 
+def newReplayState( layout, numAgents ):
+  "The starting state of a recorded game, for replay.py."
+  state = GameState()
+  state.initialize( layout, numAgents )
+  return state
+
 def runGames( layout, agents, display, length, numGames, record, numTraining, muteAgents=False, catchExceptions=False ):
   # Hack for agents writing to the display
   import __main__
@@ -795,12 +814,12 @@ def runGames( layout, agents, display, length, numGames, record, numTraining, mu
     # Enabling to students to record - addition by Lon
     g.record = None
     if record:
-      import time, cPickle, game
+      import time, replay
       fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
-      f = file(fname, 'w')
-      components = {'layout': layout, 'agents': [game.Agent() for a in agents], 'actions': g.moveHistory, 'length': length}
+      f = file(fname, 'wb')
       print "recorded"
-      g.record = cPickle.dumps(components)
+      g.record = replay.encodeGame('capture', newReplayState(layout, len(agents)), g.moveHistory,
+                                   {'length': length, 'score': g.state.data.score})
       f.write(g.record)
       f.close()
 
@@ -495,7 +495,9 @@ def readCommand( argv ):
   parser.add_option('-r', '--recordActions', action='store_true', dest='record',
                     help='Writes game histories to a file (named by the time they were played)', default=False)
   parser.add_option('--replay', dest='gameToReplay',
-                    help='A recorded game file (pickle) to replay', default=None)
+                    help='A recorded game file (replay or pickle) to replay', default=None)
+  parser.add_option('--replayFrom', dest='replayFrom', type='int',
+                    help=default('The move to start a replay from'), default=0)
   parser.add_option('-a','--agentArgs',dest='agentArgs',
                     help='Comma separated values sent to agent. e.g. "opt1=val1,opt2,opt3=val3"')
   parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
@@ -557,6 +559,12 @@ def readCommand( argv ):
   # Special case: recorded games don't use the runGames method or args structure
   if options.gameToReplay != None:
     print 'Replaying recorded game %s.' % options.gameToReplay
+    import replay
+    if replay.isReplayFile(options.gameToReplay):
+      recorded = replay.loadReplay(options.gameToReplay, newReplayState)
+      replayGame(recorded.layout, recorded.getActions(options.replayFrom), args['display'],
+                 recorded.stateAt(options.replayFrom))
+      sys.exit(0)
     import cPickle
     f = open(options.gameToReplay)
     try: recorded = cPickle.load(f)
@@ -590,12 +598,17 @@ def loadAgent(pacman, nographics):
         return getattr(module, pacman)
   raise Exception('The agent ' + pacman + ' is not specified in any *Agents.py.')
 
-def replayGame( layout, actions, display ):
+def replayGame( layout, actions, display, state = None ):
+    """
+    Shows the (agentIndex, action) pairs of a recorded game being played,
+    from the start or, if state is given, from state.
+    """
     import pacmanAgents, ghostAgents
     rules = ClassicGameRules()
-    agents = [pacmanAgents.GreedyAgent()] + [ghostAgents.RandomGhost(i+1) for i in range(layout.getNumGhosts())]
+    numGhosts = layout.getNumGhosts() if state is None else state.getNumAgents() - 1
+    agents = [pacmanAgents.GreedyAgent()] + [ghostAgents.RandomGhost(i+1) for i in range(numGhosts)]
     game = rules.newGame( layout, agents[0], agents[1:], display )
-    state = game.state
+    if state is None: state = game.state
     display.initialize(state.data)
 
     for action in actions:
@@ -608,6 +621,27 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
+def newReplayState( layout, numAgents ):
+  "The starting state of a recorded game, for replay.py."
+  state = GameState()
+  state.initialize( layout, numAgents - 1 )
+  return state
+
+def recordGame( layout, game, i ):
+  """
+  Writes the history of game number i (from 0) to a replay file (see
+  replay.py) named by the time it was played.
+  """
+  import time, replay
+  fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
+  f = file(fname, 'wb')
+  try:
+    writer = replay.ReplayWriter(f)
+    writer.addGame('classic', newReplayState(layout, len(game.agents)), game.moveHistory,
+                   {'score': game.state.getScore()})
+  finally:
+    f.close()
+
 def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30 ):
   import __main__
   __main__.__dict__['_display'] = display
@@ -629,13 +663,7 @@ def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0
     game.run()
     if not beQuiet: games.append(game)
 
-    if record:
-      import time, cPickle
-      fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
-      f = file(fname, 'w')
-      components = {'layout': layout, 'actions': game.moveHistory}
-      cPickle.dump(components, f)
-      f.close()
+    if record: recordGame(layout, game, i)
 
   if numGames > 1:
     scores = [game.state.getScore() for game in games]
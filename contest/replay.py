@@ -0,0 +1,437 @@
+# replay.py
+# ---------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A compact binary format for recorded games, shared by pacman.py and
+capture.py, that can hold one game or a whole archive of them.
+
+A file is MAGIC followed by records, each a tag byte, a varint length and a
+body, so a reader can skip any record without decoding it:
+
+  L: a layout: the SHA-1 of its text, then the text, zlib compressed.
+     It is written once per file, before the first game played on it.
+  G: a game: the SHA-1 of its layout, the rules ('classic' or 'capture'),
+     the number of agents, some integer facts (such as the final score),
+     the moves and the keyframes.
+
+Each move is one varint, agentIndex * 5 + the action's index in ACTIONS,
+which is a single byte for up to 25 agents.  Every keyframeInterval moves
+there is a keyframe: the whole state at that point (agents, food,
+capsules, score) and the offset of the next move in the move bytes.  So
+Replay.stateAt(k) restores the keyframe at or before move k and plays at
+most keyframeInterval moves from there, however long the game.
+
+Reading streams through a file a record at a time, so archives of any size
+can be browsed:
+
+  for game in readReplays(open('games.replays', 'rb'), pacman.newReplayState):
+      print game.info['score'], game.numMoves
+      state = game.stateAt(game.numMoves // 2)
+
+and from the command line:
+
+> python replay.py list games.replays
+> python replay.py show games.replays -g 3 -m 250
+> python replay.py convert games.replays recorded-game-1-... recorded-game-2-...
+
+convert packs games into one archive, from replay files or from files
+recorded with cPickle by older versions of pacman.py and capture.py.
+"""
+
+import zlib
+import struct
+import hashlib
+import optparse
+import cPickle
+from cStringIO import StringIO
+
+from game import Directions, Configuration, Grid
+import layout as layouts
+
+MAGIC = 'PACREPLAY 1\n'
+
+# Moves between keyframes
+KEYFRAME_INTERVAL = 100
+
+ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.STOP]
+ACTION_CODES = dict((action, i) for i, action in enumerate(ACTIONS))
+
+# Keyframe flags, for the state and for each agent
+WIN, LOSE, FLOAT_SCORE = 1, 2, 4
+IS_PACMAN, FLOAT_POSITION = 1, 2
+
+######################
+# Varints and fields #
+######################
+
+def writeVarint(output, n):
+    "Appends the unsigned int n to a list of bytes, seven bits per byte."
+    while n >= 0x80:
+        output.append(chr(n & 0x7f | 0x80))
+        n >>= 7
+    output.append(chr(n))
+
+def writeSigned(output, n):
+    writeVarint(output, n << 1 if n >= 0 else (-n << 1) - 1)
+
+def writeString(output, s):
+    writeVarint(output, len(s))
+    output.append(s)
+
+class _Decoder:
+    "Reads varints and fields from a byte string, from position onwards."
+    def __init__(self, data, position=0):
+        self.data = data
+        self.position = position
+
+    def varint(self):
+        data, position = self.data, self.position
+        n = shift = 0
+        while True:
+            byte = ord(data[position])
+            position += 1
+            n |= (byte & 0x7f) << shift
+            if byte < 0x80: break
+            shift += 7
+        self.position = position
+        return n
+
+    def signed(self):
+        n = self.varint()
+        return -((n + 1) >> 1) if n & 1 else n >> 1
+
+    def bytes(self, size):
+        s = self.data[self.position:self.position + size]
+        if len(s) != size: raise Exception('Replay data ends early')
+        self.position += size
+        return s
+
+    def string(self):
+        return self.bytes(self.varint())
+
+def _readVarint(input):
+    "Reads a varint from a file, or returns None at the end of the file."
+    n = shift = 0
+    while True:
+        c = input.read(1)
+        if not c:
+            if shift: raise Exception('Replay file ends early')
+            return None
+        byte = ord(c)
+        n |= (byte & 0x7f) << shift
+        if byte < 0x80: return n
+        shift += 7
+
+def layoutHash(layout):
+    return hashlib.sha1('\n'.join(layout.layoutText)).digest()
+
+#############
+# Keyframes #
+#############
+
+def encodeState(state):
+    "Returns a keyframe: the parts of a state's data the rules change."
+    data = state.data
+    out = []
+    score = data.score
+    flags = (data._win and WIN) | (data._lose and LOSE) | (type(score) == float and FLOAT_SCORE)
+    writeVarint(out, flags)
+    if flags & FLOAT_SCORE: out.append(struct.pack('<d', score))
+    else: writeSigned(out, score)
+
+    for agentState in data.agentStates:
+        x, y = agentState.configuration.pos
+        flags = (agentState.isPacman and IS_PACMAN) | (type(x) == float and FLOAT_POSITION)
+        writeVarint(out, flags)
+        writeSigned(out, int(round(x * 2)))
+        writeSigned(out, int(round(y * 2)))
+        writeVarint(out, ACTION_CODES[agentState.configuration.direction])
+        writeVarint(out, agentState.scaredTimer)
+        writeVarint(out, getattr(agentState, 'numCarrying', 0))
+        writeVarint(out, getattr(agentState, 'numReturned', 0))
+
+    height = data.layout.height
+    food = 0
+    for x, y in data.food.asList(): food |= 1 << (x * height + y)
+    writeVarint(out, food)
+    writeVarint(out, len(data.capsules))
+    for x, y in data.capsules: writeVarint(out, x * height + y)
+    return ''.join(out)
+
+def decodeState(keyframe, state):
+    "Sets a fresh state, as the rules' initialize leaves it, to a keyframe."
+    data = state.data
+    decoder = _Decoder(keyframe)
+    flags = decoder.varint()
+    if flags & FLOAT_SCORE: data.score = struct.unpack('<d', decoder.bytes(8))[0]
+    else: data.score = decoder.signed()
+    data._win, data._lose = bool(flags & WIN), bool(flags & LOSE)
+
+    for agentState in data.agentStates:
+        flags = decoder.varint()
+        x2, y2 = decoder.signed(), decoder.signed()
+        if flags & FLOAT_POSITION: pos = (x2 / 2.0, y2 / 2.0)
+        else: pos = (x2 // 2, y2 // 2)
+        agentState.configuration = Configuration(pos, ACTIONS[decoder.varint()])
+        agentState.isPacman = bool(flags & IS_PACMAN)
+        agentState.scaredTimer = decoder.varint()
+        numCarrying, numReturned = decoder.varint(), decoder.varint()
+        if hasattr(agentState, 'numCarrying'):
+            agentState.numCarrying, agentState.numReturned = numCarrying, numReturned
+
+    width, height = data.layout.width, data.layout.height
+    food = Grid(width, height)
+    bits = decoder.varint()
+    while bits:
+        low = bits & -bits
+        x, y = divmod(low.bit_length() - 1, height)
+        food[x][y] = True
+        bits ^= low
+    data.food = food
+    data.capsules = [divmod(decoder.varint(), height) for i in range(decoder.varint())]
+    data._eaten = [False for agentState in data.agentStates]
+    return state
+
+###########
+# Writing #
+###########
+
+class ReplayWriter:
+    """
+    Writes games to a file opened for binary writing, in the order they are
+    added.  Several writers should not share a file, since each writes the
+    header and its own layout records.
+    """
+    def __init__(self, output, keyframeInterval=KEYFRAME_INTERVAL):
+        self.output = output
+        self.keyframeInterval = keyframeInterval
+        self.layoutsWritten = set()
+        output.write(MAGIC)
+
+    def writeRecord(self, tag, body):
+        out = [tag]
+        writeVarint(out, len(body))
+        out.append(body)
+        self.output.write(''.join(out))
+
+    def addGame(self, rules, initialState, actions, info=None):
+        """
+        Writes a game played from initialState (as the rules named by rules
+        set it up) by actions, a list of (agentIndex, action) pairs.  info
+        maps names to integers worth keeping with the game, such as the
+        final score.  The game is replayed to take the keyframes.
+        """
+        layout = initialState.data.layout
+        key = layoutHash(layout)
+        if key not in self.layoutsWritten:
+            self.writeRecord('L', key + zlib.compress('\n'.join(layout.layoutText)))
+            self.layoutsWritten.add(key)
+
+        moves, keyframes = [], []
+        interval = self.keyframeInterval
+        state = initialState
+        for k, (agentIndex, action) in enumerate(actions):
+            if k > 0 and k % interval == 0:
+                keyframes.append((len(moves), encodeState(state)))
+            writeVarint(moves, agentIndex * len(ACTIONS) + ACTION_CODES[action])
+            state = state.generateSuccessor(agentIndex, action)
+        moves = ''.join(moves)
+
+        out = [key]
+        writeString(out, rules)
+        writeVarint(out, initialState.getNumAgents())
+        writeVarint(out, interval)
+        writeVarint(out, len(actions))
+        info = info or {}
+        writeVarint(out, len(info))
+        for name in sorted(info):
+            writeString(out, name)
+            writeSigned(out, int(info[name]))
+        writeVarint(out, len(keyframes))
+        for offset, keyframe in keyframes:
+            writeVarint(out, offset)
+            writeString(out, keyframe)
+        writeString(out, moves)
+        self.writeRecord('G', ''.join(out))
+
+def encodeGame(rules, initialState, actions, info=None, keyframeInterval=KEYFRAME_INTERVAL):
+    "Returns the contents of a replay file holding a single game."
+    output = StringIO()
+    ReplayWriter(output, keyframeInterval).addGame(rules, initialState, actions, info)
+    return output.getvalue()
+
+###########
+# Reading #
+###########
+
+class Replay:
+    """
+    One recorded game.  Its header is decoded up front; moves and states
+    are decoded on demand.  newState(layout, numAgents) must return the
+    starting state of a game under the rules the game was played by, as
+    pacman.newReplayState and capture.newReplayState do.
+    """
+    def __init__(self, body, layoutsByHash, newState=None):
+        decoder = _Decoder(body)
+        key = decoder.bytes(20)
+        if key not in layoutsByHash: raise Exception('Replay refers to a layout it does not contain')
+        self.layout = layoutsByHash[key]
+        self.rules = decoder.string()
+        self.numAgents = decoder.varint()
+        self.keyframeInterval = decoder.varint()
+        self.numMoves = decoder.varint()
+        self.info = {}
+        for i in range(decoder.varint()):
+            name = decoder.string()
+            self.info[name] = decoder.signed()
+        self.keyframes = [] # (offset into moves, keyframe)
+        for i in range(decoder.varint()):
+            offset = decoder.varint()
+            self.keyframes.append((offset, decoder.string()))
+        self.moves = decoder.string()
+        self.newState = newState
+
+    def getActions(self, start=0, stop=None):
+        "Returns the (agentIndex, action) pairs from move start up to move stop."
+        if stop == None or stop > self.numMoves: stop = self.numMoves
+        j = min(start // self.keyframeInterval, len(self.keyframes))
+        decoder = _Decoder(self.moves, self.keyframes[j - 1][0] if j > 0 else 0)
+        actions = []
+        for k in xrange(j * self.keyframeInterval, stop):
+            agentIndex, code = divmod(decoder.varint(), len(ACTIONS))
+            if k >= start: actions.append((agentIndex, ACTIONS[code]))
+        return actions
+
+    def stateAt(self, k):
+        "Returns the state after the first k moves, from the keyframe before it."
+        if self.newState == None: raise Exception('Reading states from a replay needs newState')
+        if k < 0 or k > self.numMoves: raise Exception('Move %d is not in a %d move game' % (k, self.numMoves))
+        j = min(k // self.keyframeInterval, len(self.keyframes))
+        state = self.newState(self.layout, self.numAgents)
+        if j > 0: decodeState(self.keyframes[j - 1][1], state)
+        for agentIndex, action in self.getActions(j * self.keyframeInterval, k):
+            state = state.generateSuccessor(agentIndex, action)
+        return state
+
+def readReplays(input, newState=None):
+    """
+    Yields the games in a replay file opened for binary reading, as Replays,
+    reading one record at a time.
+    """
+    if input.read(len(MAGIC)) != MAGIC: raise Exception('Not a replay file')
+    layoutsByHash = {}
+    while True:
+        tag = input.read(1)
+        if not tag: return
+        size = _readVarint(input)
+        if size == None: raise Exception('Replay file ends early')
+        body = input.read(size)
+        if len(body) != size: raise Exception('Replay file ends early')
+        if tag == 'L':
+            key = body[:20]
+            if key not in layoutsByHash:
+                layoutsByHash[key] = layouts.Layout(zlib.decompress(body[20:]).split('\n'))
+        elif tag == 'G':
+            yield Replay(body, layoutsByHash, newState)
+        # Other tags are for later versions; skip them
+
+def isReplayFile(path):
+    f = open(path, 'rb')
+    try: return f.read(len(MAGIC)) == MAGIC
+    finally: f.close()
+
+def loadReplay(path, newState=None):
+    "Returns the first game in a replay file."
+    f = open(path, 'rb')
+    try:
+        for replay in readReplays(f, newState): return replay
+    finally:
+        f.close()
+    raise Exception('%s holds no games' % path)
+
+################
+# Command line #
+################
+
+def newStateFor(rules):
+    "The newState function for games played by rules."
+    if rules == 'capture':
+        import capture
+        return capture.newReplayState
+    import pacman
+    return pacman.newReplayState
+
+if __name__ == '__main__':
+    usage = """
+  python replay.py list ARCHIVE
+  python replay.py show ARCHIVE [-g GAME] [-m MOVE]
+  python replay.py convert ARCHIVE PICKLED_GAME..."""
+    parser = optparse.OptionParser(usage)
+    parser.add_option('-g', '--game', dest='game', type='int', default=1,
+                      help='The game to show, counting from 1 [Default: %default]')
+    parser.add_option('-m', '--move', dest='move', type='int', default=0,
+                      help='Show the state after this many moves [Default: %default]')
+    parser.add_option('-i', '--interval', dest='interval', type='int', default=KEYFRAME_INTERVAL,
+                      help='Moves between keyframes when converting [Default: %default]')
+    options, args = parser.parse_args()
+    if len(args) < 2: parser.error('Give a command and an archive')
+    command, path = args[0], args[1]
+
+    if command == 'list':
+        f = open(path, 'rb')
+        for i, replay in enumerate(readReplays(f)):
+            facts = ', '.join(['%s %d' % item for item in sorted(replay.info.items())])
+            print '%d: %s, %dx%d layout, %d agents, %d moves, %d keyframes%s' % \
+                (i + 1, replay.rules, replay.layout.width, replay.layout.height, replay.numAgents,
+                 replay.numMoves, len(replay.keyframes), facts and ', ' + facts)
+        f.close()
+
+    elif command == 'show':
+        f = open(path, 'rb')
+        for i, replay in enumerate(readReplays(f)):
+            if i + 1 == options.game:
+                replay.newState = newStateFor(replay.rules)
+                print replay.stateAt(options.move)
+                break
+        else:
+            print 'There is no game %d in %s' % (options.game, path)
+        f.close()
+
+    elif command == 'convert':
+        out = open(path, 'wb')
+        writer = ReplayWriter(out, options.interval)
+        for name in args[2:]:
+            f = open(name, 'rb')
+            if isReplayFile(name):
+                for recorded in readReplays(f):
+                    newState = newStateFor(recorded.rules)
+                    writer.addGame(recorded.rules, newState(recorded.layout, recorded.numAgents),
+                                   recorded.getActions(), recorded.info)
+                    print 'Copied a game from %s: %d moves' % (name, recorded.numMoves)
+                f.close()
+                continue
+            try: recorded = cPickle.load(f)
+            finally: f.close()
+            rules = 'capture' if 'length' in recorded else 'classic'
+            layout, actions = recorded['layout'], recorded['actions']
+            if rules == 'capture': numAgents = len(recorded['agents'])
+            else: numAgents = 1 + layout.getNumGhosts() # as replayGame always has
+            info = {}
+            if 'length' in recorded: info['length'] = recorded['length']
+            writer.addGame(rules, newStateFor(rules)(layout, numAgents), actions, info)
+            print 'Converted %s: %d moves' % (name, len(actions))
+        out.close()
+
+    else:
+        parser.error('Unknown command ' + command)
@@ -0,0 +1,115 @@
+# distanceOracle.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+This file contains a DistanceOracle, which answers maze distance queries
+between any two open cells of a layout in O(1).
+
+Every open cell gets an integer id, and the distances from each source
+cell are kept in an int16 array indexed by target id.  A source's row is
+allocated and filled by a breadth first search the first time it is
+needed, so a one-off query costs one BFS and a heuristic that keeps
+asking about the same food costs one BFS per food pellet.  Each row takes
+2 bytes per open cell, so memory grows with the number of sources asked
+about: computeAll on a layout with n open cells takes 2n^2 bytes (about
+1.4MB for bigSearch).  Oracles are shared between every search problem on
+the same walls, and cell ids are those of the layout's MazeGraph (see
+mazeGraph.py).
+
+Example:
+oracle = getDistanceOracle(gameState.getWalls())
+oracle.getDistance( (1,1), (10,10) )
+"""
+
+import weakref
+from array import array
+import mazeGraph
+
+UNREACHABLE = -1
+
+class DistanceOracle:
+    def __init__(self, walls):
+        graph = mazeGraph.getMazeGraph(walls)
+        self.width = walls.width
+        self.height = walls.height
+        self.cells = graph.cells
+        self.cellIds = graph.cellIds
+        self.numCells = graph.numCells
+
+        # Adjacency between cell ids
+        self.neighbors = [list(graph.neighbors(i)) for i in range(self.numCells)]
+
+        self.rows = [None] * self.numCells # source id -> its distances, once computed
+
+    def getDistance(self, pos1, pos2):
+        """
+        Returns the maze distance between two open cells, or UNREACHABLE if
+        there is no path between them.
+        """
+        return self.getDistanceById(self.cellIds[pos1], self.cellIds[pos2])
+
+    def getDistanceById(self, i, j):
+        "Like getDistance, but for cell ids (see cellIds)."
+        row = self.rows[i]
+        if row is None:
+            row = self.rows[j]
+            if row is None: row = self._fillRow(i)
+            else: j = i
+        return row[j]
+
+    def getRow(self, pos):
+        """
+        Returns (offset, distances) such that distances[offset + j] is the
+        distance from pos to the cell with id j.
+        """
+        i = self.cellIds[pos]
+        row = self.rows[i]
+        if row is None: row = self._fillRow(i)
+        return 0, row
+
+    def computeAll(self):
+        "Fills in every row, e.g. before timing-sensitive work."
+        for i in range(self.numCells):
+            if self.rows[i] is None: self._fillRow(i)
+        return self
+
+    def _fillRow(self, source):
+        neighbors = self.neighbors
+        distances = array('h', [UNREACHABLE]) * self.numCells
+        distances[source] = 0
+        layer, depth = [source], 0
+        while layer:
+            depth += 1
+            nextLayer = []
+            for node in layer:
+                for other in neighbors[node]:
+                    if distances[other] == UNREACHABLE and other != source:
+                        distances[other] = depth
+                        nextLayer.append(other)
+            layer = nextLayer
+        self.rows[source] = distances
+        return distances
+
+oracleMap = weakref.WeakKeyDictionary() # MazeGraph -> DistanceOracle
+
+def getDistanceOracle(walls):
+    """
+    Returns the DistanceOracle for a walls Grid, building it the first
+    time a layout with these walls is seen.  It is dropped, rows and all,
+    with the layout's MazeGraph (see getMazeGraph).
+    """
+    graph = mazeGraph.getMazeGraph(walls)
+    if graph not in oracleMap:
+        oracleMap[graph] = DistanceOracle(walls)
+    return oracleMap[graph]
@@ -14,54 +14,83 @@
 
 import search
 import random
+import patternDatabase
 
 # Module Classes
 
-class EightPuzzleState:
-    """
-    The Eight Puzzle is described in the course textbook on
-    page 64.
+_GOALS = {}  # size -> packed goal state
+_MOVES = {}  # size -> for each blank cell, [(move, cell the blank moves to)]
 
-    This class defines the mechanics of the puzzle itself.  The
-    task of recasting this puzzle as a search problem is left to
-    the EightPuzzleSearchProblem class.
+def _movesFor(size):
+    if size not in _MOVES:
+        moves = []
+        for cell in range(size * size):
+            row, col = divmod(cell, size)
+            legal = []
+            if row != 0: legal.append(('up', cell - size))
+            if row != size - 1: legal.append(('down', cell + size))
+            if col != 0: legal.append(('left', cell - 1))
+            if col != size - 1: legal.append(('right', cell + 1))
+            moves.append(legal)
+        _MOVES[size] = moves
+        _GOALS[size] = sum([cell << (4 * cell) for cell in range(size * size)])
+    return _MOVES[size]
+
+class SlidingPuzzleState(object):
+    """
+    A sliding tile puzzle on a size x size board, with tiles numbered from 1
+    and 0 for the blank.
+
+    The whole board is packed into one integer: the number in cell i
+    (counting along the rows from the top left) is held in bits 4i to 4i+3,
+    so even the 15-puzzle fits in 64 bits.  A move is a couple of shifts,
+    and states hash and compare as their packed integer.  States are
+    immutable.
     """
+    __slots__ = ('size', 'packed', 'blank')
+
+    def __init__( self, numbers, size=None ):
+        if size == None: size = int(round(len(numbers) ** 0.5))
+        if sorted(numbers) != range(size * size):
+            raise Exception('Not a %dx%d puzzle: %s' % (size, size, str(numbers)))
+        _movesFor(size)
+        self.size = size
+        self.packed = 0
+        for cell, number in enumerate(numbers):
+            self.packed |= number << (4 * cell)
+        self.blank = list(numbers).index(0)
+
+    def _successor( self, packed, blank ):
+        puzzle = object.__new__(self.__class__)
+        puzzle.size, puzzle.packed, puzzle.blank = self.size, packed, blank
+        return puzzle
 
-    def __init__( self, numbers ):
-        """
-          Constructs a new eight puzzle from an ordering of numbers.
+    def getCell( self, cell ):
+        "Returns the number in a cell (0 for the blank)."
+        return (self.packed >> (4 * cell)) & 15
 
-        numbers: a list of integers from 0 to 8 representing an
-          instance of the eight puzzle.  0 represents the blank
-          space.  Thus, the list
+    def tilePositions( self ):
+        "Returns a list whose entry t is the cell tile t is in."
+        positions = [0] * (self.size * self.size)
+        packed = self.packed
+        for cell in range(self.size * self.size):
+            positions[packed & 15] = cell
+            packed >>= 4
+        return positions
 
-            [1, 0, 2, 3, 4, 5, 6, 7, 8]
+    def _getCells( self ):
+        return [[self.getCell(row * self.size + col) for col in range(self.size)]
+                for row in range(self.size)]
+    cells = property(_getCells, doc='The board as a list of rows')
 
-          represents the eight puzzle:
-            -------------
-            | 1 |   | 2 |
-            -------------
-            | 3 | 4 | 5 |
-            -------------
-            | 6 | 7 | 8 |
-            ------------
-
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
-        """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range( 3 ):
-            self.cells.append( [] )
-            for col in range( 3 ):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+    def _getBlankLocation( self ):
+        return divmod(self.blank, self.size)
+    blankLocation = property(_getBlankLocation, doc='(row, col) of the blank')
 
     def isGoal( self ):
         """
-          Checks to see if the puzzle is in its goal state.
+          Checks to see if the puzzle is in its goal state: every tile in
+        order, with the blank top left.
 
             -------------
             |   | 1 | 2 |
@@ -77,13 +106,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
         False
         """
-        current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.packed == _GOALS[self.size]
 
     def legalMoves( self ):
         """
@@ -95,108 +118,153 @@ class EightPuzzleState:
         >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]).legalMoves()
         ['down', 'right']
         """
-        moves = []
-        row, col = self.blankLocation
-        if(row != 0):
-            moves.append('up')
-        if(row != 2):
-            moves.append('down')
-        if(col != 0):
-            moves.append('left')
-        if(col != 2):
-            moves.append('right')
-        return moves
-
-    def result(self, move):
+        return [move for move, cell in _MOVES[self.size][self.blank]]
+
+    def result( self, move ):
         """
-          Returns a new eightPuzzle with the current state and blankLocation
+          Returns a new puzzle with the current state and blank location
         updated based on the provided move.
 
         The move should be a string drawn from a list returned by legalMoves.
-        Illegal moves will raise an exception, which may be an array bounds
-        exception.
+        Illegal moves raise an exception.
 
         NOTE: This function *does not* change the current object.  Instead,
         it returns a new object.
         """
-        row, col = self.blankLocation
-        if(move == 'up'):
-            newrow = row - 1
-            newcol = col
-        elif(move == 'down'):
-            newrow = row + 1
-            newcol = col
-        elif(move == 'left'):
-            newrow = row
-            newcol = col - 1
-        elif(move == 'right'):
-            newrow = row
-            newcol = col + 1
-        else:
-            raise "Illegal Move"
-
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = newrow, newcol
-
-        return newPuzzle
+        for legal, cell in _MOVES[self.size][self.blank]:
+            if legal == move:
+                tile = (self.packed >> (4 * cell)) & 15
+                return self._successor(self.packed - (tile << (4 * cell)) + (tile << (4 * self.blank)), cell)
+        raise Exception('Illegal move: ' + str(move))
+
+    def successors( self ):
+        "Returns (puzzle, move) for every legal move, without going through result."
+        packed, blank = self.packed, self.blank
+        succ = []
+        for move, cell in _MOVES[self.size][blank]:
+            tile = (packed >> (4 * cell)) & 15
+            succ.append((self._successor(packed - (tile << (4 * cell)) + (tile << (4 * blank)), cell), move))
+        return succ
 
     # Utilities for comparison and display
-    def __eq__(self, other):
+    def __eq__( self, other ):
         """
-            Overloads '==' such that two eightPuzzles with the same configuration
+            Overloads '==' such that two puzzles with the same configuration
           are equal.
 
           >>> EightPuzzleState([0, 1, 2, 3, 4, 5, 6, 7, 8]) == \
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        return isinstance(other, SlidingPuzzleState) and \
+            self.size == other.size and self.packed == other.packed
+
+    def __ne__( self, other ):
+        return not self == other
 
-    def __hash__(self):
-        return hash(str(self.cells))
+    def __hash__( self ):
+        return hash(self.packed)
 
-    def __getAsciiString(self):
+    def __getAsciiString( self ):
         """
-          Returns a display string for the maze
+          Returns a display string for the puzzle
         """
+        width = len(str(self.size * self.size - 1))
         lines = []
-        horizontalLine = ('-' * (13))
+        horizontalLine = ('-' * ((width + 3) * self.size + 1))
         lines.append(horizontalLine)
         for row in self.cells:
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = rowLine + ' ' + col.__str__() + ' |'
+                rowLine = rowLine + ' ' + str(col).rjust(width) + ' |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
 
-    def __str__(self):
+    def __str__( self ):
         return self.__getAsciiString()
 
+class EightPuzzleState(SlidingPuzzleState):
+    """
+    The Eight Puzzle is described in the course textbook on
+    page 64.
+
+    This class defines the mechanics of the puzzle itself.  The
+    task of recasting this puzzle as a search problem is left to
+    the EightPuzzleSearchProblem class.
+    """
+    __slots__ = ()
+
+    def __init__( self, numbers ):
+        """
+          Constructs a new eight puzzle from an ordering of numbers.
+
+        numbers: a list of integers from 0 to 8 representing an
+          instance of the eight puzzle.  0 represents the blank
+          space.  Thus, the list
+
+            [1, 0, 2, 3, 4, 5, 6, 7, 8]
+
+          represents the eight puzzle:
+            -------------
+            | 1 |   | 2 |
+            -------------
+            | 3 | 4 | 5 |
+            -------------
+            | 6 | 7 | 8 |
+            ------------
+
+        The configuration of the puzzle is packed into a single integer
+        (see SlidingPuzzleState); 'cells' gives it as a list of rows.
+        """
+        SlidingPuzzleState.__init__(self, numbers, 3)
+
+class FifteenPuzzleState(SlidingPuzzleState):
+    """
+    The 15-puzzle: numbers is a list of the integers from 0 to 15, row by
+    row, with 0 for the blank.  The goal has the blank top left.
+    """
+    __slots__ = ()
+
+    def __init__( self, numbers ):
+        SlidingPuzzleState.__init__(self, numbers, 4)
+
+def manhattanPuzzleHeuristic(state, problem=None):
+    "The sum of the distances of every tile from its goal cell."
+    size = state.size
+    distance = 0
+    for tile, cell in enumerate(state.tilePositions()):
+        if tile != 0:
+            row, col = divmod(cell, size)
+            goalRow, goalCol = divmod(tile, size)
+            distance += abs(row - goalRow) + abs(col - goalCol)
+    return distance
+
+def patternDatabaseHeuristic(state, problem=None):
+    """
+    The disjoint additive pattern database estimate for the puzzle (see
+    patternDatabase.py).  The first call for a board size loads, or builds
+    and saves, its databases.
+    """
+    return patternDatabase.getAdditiveHeuristic(state.size).estimate(state.tilePositions())
+
 # TODO: Implement The methods in this class
 
 class EightPuzzleSearchProblem(search.SearchProblem):
     """
       Implementation of a SearchProblem for the  Eight Puzzle domain
 
-      Each state is represented by an instance of an eightPuzzle.
+      Each state is represented by an instance of an eightPuzzle.  Any
+      SlidingPuzzleState works, so this also solves 15-puzzles.
     """
     def __init__(self,puzzle):
         "Creates a new EightPuzzleSearchProblem which stores search information."
         self.puzzle = puzzle
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -207,10 +275,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
           each succesor is either left, right, up, or down
           from the original state and the cost is 1.0 for each
         """
-        succ = []
-        for a in state.legalMoves():
-            succ.append((state.result(a), a, 1))
-        return succ
+        return [(puzzle, a, 1) for puzzle, a in state.successors()]
 
     def getCostOfActions(self, actions):
         """
@@ -256,7 +321,33 @@ def createRandomEightPuzzle(moves=100):
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    return scramble(EightPuzzleState(range(9)), moves)
+
+# 15-puzzles with optimal solutions of 42, 45, 46 and 52 moves
+FIFTEEN_PUZZLE_DATA = [[4, 5, 7, 2, 9, 14, 12, 13, 0, 3, 6, 11, 8, 1, 15, 10],
+                       [14, 1, 9, 6, 4, 8, 12, 5, 7, 2, 3, 0, 10, 11, 13, 15],
+                       [3, 14, 9, 11, 5, 4, 8, 2, 13, 12, 6, 7, 10, 1, 15, 0],
+                       [2, 11, 15, 5, 13, 4, 6, 7, 12, 8, 10, 1, 9, 3, 14, 0]]
+
+def loadFifteenPuzzle(puzzleNumber):
+    """
+      puzzleNumber: The number of the 15-puzzle to load, from 0 to 3.
+
+      Returns a FifteenPuzzleState from FIFTEEN_PUZZLE_DATA.
+    """
+    return FifteenPuzzleState(FIFTEEN_PUZZLE_DATA[puzzleNumber])
+
+def createRandomFifteenPuzzle(moves=100):
+    """
+      moves: number of random moves to apply
+
+      Creates a random 15-puzzle by applying a series of 'moves' random
+      moves to a solved puzzle.
+    """
+    return scramble(FifteenPuzzleState(range(16)), moves)
+
+def scramble(puzzle, moves):
+    "Applies 'moves' random legal moves to a puzzle."
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
@@ -268,8 +359,8 @@ if __name__ == '__main__':
     print(puzzle)
 
     problem = EightPuzzleSearchProblem(puzzle)
-    path = search.breadthFirstSearch(problem)
-    print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    path = search.aStarSearch(problem, patternDatabaseHeuristic)
+    print('A* found a path of %d moves: %s' % (len(path), str(path)))
     curr = puzzle
     i = 1
     for a in path:
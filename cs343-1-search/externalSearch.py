@@ -0,0 +1,274 @@
+# externalSearch.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+This file contains a disk-backed breadth first / uniform cost search for
+state spaces too big for the in-memory searches of search.py, using
+delayed duplicate detection (Korf, 2003).
+
+Nothing about the states is kept in memory.  Successors are appended, as
+fixed width records, to the file of the layer (depth, or path cost) they
+belong to, duplicates and all.  When a layer comes up, its file is sorted
+by external merge sort, which brings copies of the same state together,
+and merged against the sorted file of every state already closed; what is
+left is the layer proper, written out sorted, and expanded next.  Memory
+use is bounded by the sort buffer (memoryRecords records) whatever the
+size of the search.
+
+A record is a state's key followed by its parent's, each packed into the
+same number of big-endian bytes, so sorting the byte strings sorts the
+keys.  The path is rebuilt at the end by looking each parent up, with a
+binary search, in the memory-mapped file of its layer.
+
+Problems opt in by packing their states into non-negative ints:
+
+  getPackedBits(): the most bits a packed state needs
+  packState(state): returns the state's key
+  unpackState(key): returns the state with that key
+
+FoodSearchProblem in searchAgents.py provides them.  Use the searches
+through search.py, e.g.
+
+> python pacman.py -l trickySearch -p SearchAgent -a fn=ebfs,prob=FoodSearchProblem
+"""
+
+import os
+import mmap
+import heapq
+import shutil
+import tempfile
+
+# Records sorted in memory at once, per sort run
+MEMORY_RECORDS = 1 << 20
+
+# Bytes read or written per file operation
+BLOCK_BYTES = 1 << 16
+
+def _readRecords(path, size):
+    "Yields the records of a file, size bytes each."
+    input = open(path, 'rb')
+    step = max(BLOCK_BYTES // size, 1) * size
+    try:
+        while True:
+            block = input.read(step)
+            if not block: break
+            for i in xrange(0, len(block), size):
+                yield block[i:i + size]
+    finally:
+        input.close()
+
+class _RecordWriter:
+    "Appends fixed width records to a file, in blocks."
+    def __init__(self, path):
+        self.output = open(path, 'ab')
+        self.buffer = []
+        self.count = 0
+
+    def write(self, record):
+        self.buffer.append(record)
+        self.count += 1
+        if len(self.buffer) * len(record) >= BLOCK_BYTES: self.flush()
+
+    def flush(self):
+        self.output.write(''.join(self.buffer))
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.output.close()
+
+class LayeredSearch:
+    """
+    One run of the search, in its own temporary directory:
+
+      layer<g>.raw:  the records generated for layer g, unsorted
+      layer<g>.bin:  the states new in layer g with a parent each, sorted
+      closed<n>.bin: the keys of every state in the layers done so far, sorted
+    """
+    def __init__(self, problem, stats, byCost, directory=None, memoryRecords=MEMORY_RECORDS):
+        for method in ['getPackedBits', 'packState', 'unpackState']:
+            if not hasattr(problem, method):
+                raise Exception('Disk-backed search needs a problem with ' + method + '(), which %s lacks'
+                                % problem.__class__.__name__)
+        self.problem = problem
+        self.stats = stats
+        self.byCost = byCost
+        self.memoryRecords = int(memoryRecords)
+        self.keySize = (problem.getPackedBits() + 7) // 8 or 1
+        self.recordSize = 2 * self.keySize
+        self.directory = tempfile.mkdtemp(prefix='search', dir=directory)
+        self.raw = {} # layer -> _RecordWriter for layer<g>.raw
+        self.layers = {} # layer -> path of layer<g>.bin, for the layers done
+        self.closed = None
+
+    def cleanUp(self):
+        for writer in self.raw.values(): writer.close()
+        shutil.rmtree(self.directory, True)
+
+    def pack(self, state):
+        return ('%0*x' % (2 * self.keySize, self.problem.packState(state))).decode('hex')
+
+    def unpack(self, key):
+        return self.problem.unpackState(int(key.encode('hex'), 16))
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def generate(self, layer, key, parentKey):
+        if layer not in self.raw:
+            self.raw[layer] = _RecordWriter(self.path('layer%d.raw' % layer))
+        self.raw[layer].write(key + parentKey)
+        self.stats.generated += 1
+
+    def sortRuns(self, layer):
+        "Sorts layer<g>.raw into sorted runs of at most memoryRecords records."
+        self.raw.pop(layer).close()
+        rawPath = self.path('layer%d.raw' % layer)
+        runs, records = [], []
+        for record in _readRecords(rawPath, self.recordSize):
+            records.append(record)
+            if len(records) == self.memoryRecords:
+                runs.append(self.writeRun(records, len(runs)))
+                records = []
+        if records or not runs: runs.append(self.writeRun(records, len(runs)))
+        os.remove(rawPath)
+        return runs
+
+    def writeRun(self, records, i):
+        records.sort()
+        path = self.path('run%d.bin' % i)
+        writer = _RecordWriter(path)
+        last = None
+        for record in records:
+            if record[:self.keySize] != last: writer.write(record)
+            last = record[:self.keySize]
+        writer.close()
+        return path
+
+    def closeLayer(self, layer):
+        """
+        Merges the runs of a layer, drops every state already closed and
+        writes the rest to layer<g>.bin, and the new closed set alongside.
+        Returns the number of states in the layer.
+        """
+        runs = self.sortRuns(layer)
+        keySize = self.keySize
+        layerPath = self.path('layer%d.bin' % layer)
+        closedPath = self.path('closed%d.bin' % layer)
+        layerWriter, closedWriter = _RecordWriter(layerPath), _RecordWriter(closedPath)
+
+        # Walk the merged runs and the old closed set side by side
+        closed = iter(()) if self.closed == None else _readRecords(self.closed, keySize)
+        closedKey = next(closed, None)
+        last = None
+        for record in heapq.merge(*[_readRecords(run, self.recordSize) for run in runs]):
+            key = record[:keySize]
+            if key == last: continue
+            last = key
+            while closedKey != None and closedKey < key:
+                closedWriter.write(closedKey)
+                closedKey = next(closed, None)
+            if closedKey == key: continue
+            layerWriter.write(record)
+            closedWriter.write(key)
+        while closedKey != None:
+            closedWriter.write(closedKey)
+            closedKey = next(closed, None)
+        layerWriter.close()
+        closedWriter.close()
+
+        for run in runs: os.remove(run)
+        if self.closed != None: os.remove(self.closed)
+        self.closed = closedPath
+        self.layers[layer] = layerPath
+        return layerWriter.count
+
+    def find(self, layer, key):
+        "Returns the parent key stored with key in a finished layer, or None."
+        path = self.layers.get(layer)
+        if path == None or os.path.getsize(path) == 0: return None
+        input = open(path, 'rb')
+        try:
+            data = mmap.mmap(input.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            input.close()
+        try:
+            size, keySize = self.recordSize, self.keySize
+            low, high = 0, len(data) // size
+            while low < high:
+                middle = (low + high) // 2
+                found = data[middle * size:middle * size + keySize]
+                if found == key: return data[middle * size + keySize:(middle + 1) * size]
+                if found < key: low = middle + 1
+                else: high = middle
+            return None
+        finally:
+            data.close()
+
+    def rebuildPath(self, layer, key, parentKey):
+        "Returns the actions leading from the start to key, found in layer."
+        actions = []
+        while layer > 0:
+            parent = self.unpack(parentKey)
+            for state, action, stepCost in self.problem.getSuccessors(parent):
+                if self.pack(state) != key: continue
+                parentLayer = layer - (stepCost if self.byCost else 1)
+                grandparentKey = self.find(parentLayer, parentKey)
+                if grandparentKey != None: break
+            else:
+                raise Exception('Lost the path back from layer %d' % layer)
+            actions.append(action)
+            layer, key, parentKey = parentLayer, parentKey, grandparentKey
+        actions.reverse()
+        return actions
+
+    def run(self):
+        problem = self.problem
+        startKey = self.pack(problem.getStartState())
+        self.generate(0, startKey, startKey)
+        self.stats.generated = 0
+        while self.raw:
+            layer = min(self.raw)
+            size = self.closeLayer(layer)
+            if size > self.stats.maxFrontier: self.stats.maxFrontier = size
+            for record in _readRecords(self.layers[layer], self.recordSize):
+                key, parentKey = record[:self.keySize], record[self.keySize:]
+                state = self.unpack(key)
+                if problem.isGoalState(state):
+                    return self.rebuildPath(layer, key, parentKey)
+                self.stats.expanded += 1
+                for next, action, stepCost in problem.getSuccessors(state):
+                    if self.byCost:
+                        if stepCost <= 0 or stepCost != int(stepCost):
+                            raise Exception('Disk-backed uniform cost search needs positive integer step costs, not %s'
+                                            % stepCost)
+                        nextLayer = layer + int(stepCost)
+                    else:
+                        nextLayer = layer + 1
+                    self.generate(nextLayer, self.pack(next), key)
+        return None
+
+def layeredSearch(problem, stats, byCost, directory=None, memoryRecords=MEMORY_RECORDS):
+    """
+    Runs a disk-backed search and returns its path, or None.  Layers are
+    path costs when byCost is set (uniform cost search; step costs must be
+    positive integers) and depths otherwise (breadth first search).  The
+    files go in a temporary directory inside directory (by default the
+    system's), removed again at the end.
+    """
+    layered = LayeredSearch(problem, stats, byCost, directory, memoryRecords)
+    try:
+        return layered.run()
+    finally:
+        layered.cleanUp()
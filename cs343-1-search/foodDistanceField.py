@@ -0,0 +1,150 @@
+# foodDistanceField.py
+# --------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+This file contains a FoodDistanceField: the maze distance from every open
+cell to the nearest remaining food, kept up to date as food is eaten.
+
+The field starts as one breadth first search outwards from all the food at
+once.  Eating a pellet can only make cells further from food, and only the
+cells whose every shortest route to food ended at that pellet: those are
+found by walking outwards from it, and get new distances from the cells
+around them that kept theirs.  So each pellet costs work in proportion to
+the part of the maze it was closest to, not the whole maze.
+
+pathToClosestFood follows the field downhill from Pacman, which visits
+exactly the cells breadth first search from Pacman would visit on its way
+to the nearest food, in the same order.  It therefore returns the same
+path as search.bfs(AnyFoodSearchProblem(...)), without exploring the rest
+of the ball around Pacman.
+
+Example:
+field = FoodDistanceField(mazeGraph.getMazeGraph(walls), food.asList())
+actions, pellet = field.pathToClosestFood(pacmanPosition)
+field.removeFood(pellet)
+"""
+
+import heapq
+from array import array
+from collections import deque
+
+FAR = 2 ** 30 # The distance of cells that cannot reach any food
+
+class FoodDistanceField:
+    def __init__(self, graph, foodPositions):
+        self.graph = graph
+        self.food = set([graph.cellIds[position] for position in foodPositions])
+        self.distances = array('l', [FAR]) * graph.numCells
+
+        # Multi-source breadth first search from every pellet
+        distances, offsets, targets = self.distances, graph.offsets, graph.targets
+        queue = deque(sorted(self.food))
+        for cell in queue: distances[cell] = 0
+        while queue:
+            cell = queue.popleft()
+            further = distances[cell] + 1
+            for k in xrange(offsets[cell], offsets[cell + 1]):
+                next = targets[k]
+                if distances[next] > further:
+                    distances[next] = further
+                    queue.append(next)
+
+    def foodLeft(self):
+        return len(self.food)
+
+    def getDistance(self, position):
+        "Returns the maze distance from position to the nearest food, or FAR."
+        return self.distances[self.graph.cellIds[position]]
+
+    def removeFood(self, position):
+        """
+        Marks the food at position as eaten and raises the distances of the
+        cells that were closest to it.
+        """
+        pellet = self.graph.cellIds[position]
+        self.food.remove(pellet)
+        distances, offsets, targets = self.distances, self.graph.offsets, self.graph.targets
+
+        # Cells lose their distance when none of their neighbours one step
+        # closer to food keeps its own; walk outwards in order of distance
+        affected = set([pellet])
+        queue = deque([pellet])
+        while queue:
+            cell = queue.popleft()
+            further = distances[cell] + 1
+            for k in xrange(offsets[cell], offsets[cell + 1]):
+                next = targets[k]
+                if distances[next] != further or next in affected: continue
+                supported = False
+                for j in xrange(offsets[next], offsets[next + 1]):
+                    other = targets[j]
+                    if distances[other] == distances[next] - 1 and other not in affected:
+                        supported = True
+                        break
+                if not supported:
+                    affected.add(next)
+                    queue.append(next)
+
+        # New distances for the affected cells, spreading in from the cells
+        # around them (a small Dijkstra, since they start out uneven)
+        frontier = []
+        for cell in affected:
+            best = FAR
+            for k in xrange(offsets[cell], offsets[cell + 1]):
+                other = targets[k]
+                if other not in affected and distances[other] + 1 < best:
+                    best = distances[other] + 1
+            distances[cell] = best
+            if best < FAR: frontier.append((best, cell))
+        heapq.heapify(frontier)
+        while frontier:
+            distance, cell = heapq.heappop(frontier)
+            if distance > distances[cell]: continue
+            for k in xrange(offsets[cell], offsets[cell + 1]):
+                next = targets[k]
+                if distances[next] > distance + 1:
+                    distances[next] = distance + 1
+                    heapq.heappush(frontier, (distance + 1, next))
+
+    def pathToClosestFood(self, position):
+        """
+        Returns (actions, food position) for the path breadth first search
+        from position would find to the nearest food, or (None, None) if no
+        food can be reached.
+        """
+        graph = self.graph
+        distances, offsets, targets = self.distances, graph.offsets, graph.targets
+        start = graph.cellIds[position]
+        if distances[start] == FAR: return None, None
+
+        # Breadth first search that only steps downhill in the field
+        parents = {start: None} # cell -> (previous cell, index of the move)
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            if distances[cell] == 0: break
+            closer = distances[cell] - 1
+            for k in xrange(offsets[cell], offsets[cell + 1]):
+                next = targets[k]
+                if distances[next] == closer and next not in parents:
+                    parents[next] = (cell, k)
+                    queue.append(next)
+
+        actions = []
+        pellet = cell
+        while parents[cell] != None:
+            cell, k = parents[cell]
+            actions.append(graph.actions[k])
+        actions.reverse()
+        return actions, graph.cells[pellet]
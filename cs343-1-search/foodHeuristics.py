@@ -0,0 +1,130 @@
+# foodHeuristics.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Memoized lower bounds on the cost of eating all remaining food, for
+FoodSearchProblem.  All distances are true maze distances from a
+DistanceOracle (see distanceOracle.py).
+
+With more than 'exactLimit' pellets left the bound is
+
+  (minimum spanning tree over the food) + (distance to the nearest food)
+
+and with 'exactLimit' or fewer it is exact: a Held-Karp dynamic program
+gives, for each pellet, the shortest path that starts there and visits
+every other pellet, and the heuristic adds the distance from Pacman to the
+best starting pellet.  Both bounds are consistent, and so is switching from
+one to the other, since the exact one is only used once food is eaten.
+
+The part of the bound that only depends on the remaining food is memoized
+in an LRUCache keyed on the food grid, because A* keeps seeing the same food
+subsets with Pacman in different places.
+"""
+
+import util
+
+EXACT_FOOD_LIMIT = 8     # Use Held-Karp with this many pellets left or fewer
+CACHE_SIZE = 50000       # Food sets remembered by each FoodHeuristic
+TABLE_CACHE_SIZE = 16    # Held-Karp tables remembered by each FoodHeuristic
+
+INFINITY = float('inf')
+
+class FoodHeuristic:
+    """
+    Callable as heuristic(position, foodGrid).  foodGrid can be a BitGrid or
+    a Grid (see game.py); BitGrids make the memo lookups O(1).
+    """
+    def __init__(self, distances, exactLimit=EXACT_FOOD_LIMIT, cacheSize=CACHE_SIZE):
+        self.distances = distances
+        self.exactLimit = exactLimit
+        self.summaries = util.LRUCache(cacheSize) # food -> (food ids, exact?, bound data)
+        self.tables = util.LRUCache(TABLE_CACHE_SIZE) # tuple of food ids -> Held-Karp table
+
+    def __call__(self, position, foodGrid):
+        summary = self.summaries.get(foodGrid)
+        if summary == None:
+            summary = self._summarize(foodGrid)
+            self.summaries[foodGrid] = summary
+        foodIds, exact, value = summary
+        if not foodIds: return 0
+
+        offset, row = self.distances.getRow(position)
+        if exact:
+            return min([row[offset + f] + value[k] for k, f in enumerate(foodIds)])
+        return value + min([row[offset + f] for f in foodIds])
+
+    def _summarize(self, foodGrid):
+        cellIds = self.distances.cellIds
+        foodIds = tuple([cellIds[food] for food in foodGrid.asList()])
+        if len(foodIds) <= self.exactLimit:
+            return foodIds, True, self._pathCosts(foodIds)
+        return foodIds, False, self._spanningTreeCost(foodIds)
+
+    def _spanningTreeCost(self, foodIds):
+        "Prim's algorithm on the complete graph of maze distances between food."
+        distance = self.distances.getDistanceById
+        best = dict((f, distance(foodIds[0], f)) for f in foodIds[1:])
+        total = 0
+        while best:
+            nearest = min(best, key=best.get)
+            total += best.pop(nearest)
+            for f in best:
+                d = distance(nearest, f)
+                if d < best[f]: best[f] = d
+        return total
+
+    def _pathCosts(self, foodIds):
+        """
+        Returns, for each pellet in foodIds, the length of the shortest path
+        that starts on it and visits all the others.  Reuses a cached table
+        computed for a superset of this food when there is one.
+        """
+        for rootIds in self.tables.data.keys():
+            table = self.tables.data[rootIds]
+            bit = dict((f, 1 << i) for i, f in enumerate(rootIds))
+            if all([f in bit for f in foodIds]):
+                self.tables.get(rootIds)
+                break
+        else:
+            rootIds = foodIds
+            bit = dict((f, 1 << i) for i, f in enumerate(rootIds))
+            table = self._heldKarp(rootIds)
+            self.tables[rootIds] = table
+
+        mask = 0
+        for f in foodIds: mask |= bit[f]
+        index = dict((f, i) for i, f in enumerate(rootIds))
+        return [table[mask][index[f]] for f in foodIds]
+
+    def _heldKarp(self, foodIds):
+        """
+        table[mask][i] is the shortest path that starts on pellet i and visits
+        exactly the pellets in mask (i must be in mask).
+        """
+        n = len(foodIds)
+        distance = self.distances.getDistanceById
+        d = [[distance(a, b) for b in foodIds] for a in foodIds]
+        table = [None] * (1 << n)
+        for mask in range(1, 1 << n):
+            members = [i for i in range(n) if mask & (1 << i)]
+            row = [INFINITY] * n
+            if len(members) == 1:
+                row[members[0]] = 0
+            else:
+                for i in members:
+                    rest = table[mask ^ (1 << i)]
+                    di = d[i]
+                    row[i] = min([di[j] + rest[j] for j in members if j != i])
+            table[mask] = row
+        return table
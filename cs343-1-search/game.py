@@ -21,8 +21,9 @@
 # For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
 
 from util import *
-import time, os
+import time, os, random, string
 import traceback
+import weakref
 import sys
 
 #######################
@@ -67,7 +68,7 @@ class Directions:
                WEST: EAST,
                STOP: STOP}
 
-class Configuration:
+class Configuration(object):
     """
     A Configuration holds the (x,y) coordinate of a character, along with its
     traveling direction.
@@ -75,6 +76,7 @@ class Configuration:
     The convention for positions, like a graph, is that (0,0) is the lower left corner, x increases
     horizontally and y increases vertically.  Therefore, north is the direction of increasing y, or (0,1).
     """
+    __slots__ = ('pos', 'direction')
 
     def __init__(self, pos, direction):
         self.pos = pos
@@ -99,6 +101,12 @@ class Configuration:
         y = hash(self.direction)
         return hash(x + 13 * y)
 
+    def __getstate__(self):
+        return (self.pos, self.direction)
+
+    def __setstate__(self, state):
+        self.pos, self.direction = state
+
     def __str__(self):
         return "(x,y)="+str(self.pos)+", "+str(self.direction)
 
@@ -117,10 +125,11 @@ class Configuration:
             direction = self.direction # There is no stop direction
         return Configuration((x + dx, y+dy), direction)
 
-class AgentState:
+class AgentState(object):
     """
     AgentStates hold the state of an agent (configuration, speed, scared, etc).
     """
+    __slots__ = ('start', 'configuration', 'isPacman', 'scaredTimer', 'numCarrying', 'numReturned')
 
     def __init__( self, startConfiguration, isPacman ):
         self.start = startConfiguration
@@ -144,6 +153,12 @@ class AgentState:
     def __hash__(self):
         return hash(hash(self.configuration) + 13 * hash(self.scaredTimer))
 
+    def __getstate__(self):
+        return (self.start, self.configuration, self.isPacman, self.scaredTimer, self.numCarrying, self.numReturned)
+
+    def __setstate__(self, state):
+        self.start, self.configuration, self.isPacman, self.scaredTimer, self.numCarrying, self.numReturned = state
+
     def copy( self ):
         state = AgentState( self.start, self.isPacman )
         state.configuration = self.configuration
@@ -159,21 +174,28 @@ class AgentState:
     def getDirection(self):
         return self.configuration.getDirection()
 
-class Grid:
+# Grid cells as the digits of a binary number, for Grid.__hash__
+_BIT_DIGITS = string.maketrans('\x00\x01', '01')
+
+class Grid(object):
     """
-    A 2-dimensional array of objects backed by a list of lists.  Data is accessed
-    via grid[x][y] where (x,y) are positions on a Pacman map with x horizontal,
-    y vertical and the origin (0,0) in the bottom left corner.
+    A 2-dimensional array of booleans backed by a list of bytearray columns, one
+    byte per cell.  Data is accessed via grid[x][y] where (x,y) are positions on
+    a Pacman map with x horizontal, y vertical and the origin (0,0) in the bottom
+    left corner.  Cells read back as 1 or 0, which behave like True and False.
 
     The __str__ method constructs an output that is oriented like a pacman board.
     """
-    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+    __slots__ = ('width', 'height', 'data', '__weakref__')
+    CELLS_PER_INT = 30
+
+    def __init__(self, width=0, height=0, initialValue=False, bitRepresentation=None):
         if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
-        self.CELLS_PER_INT = 30
 
         self.width = width
         self.height = height
-        self.data = [[initialValue for y in range(height)] for x in range(width)]
+        column = bytearray([initialValue]) * height
+        self.data = [column[:] for x in range(width)]
         if bitRepresentation:
             self._unpackBits(bitRepresentation)
 
@@ -184,24 +206,27 @@ class Grid:
         self.data[key] = item
 
     def __str__(self):
-        out = [[str(self.data[x][y])[0] for x in range(self.width)] for y in range(self.height)]
+        out = [['FT'[self.data[x][y]] for x in range(self.width)] for y in range(self.height)]
         out.reverse()
         return '\n'.join([''.join(x) for x in out])
 
     def __eq__(self, other):
-        if other == None: return False
+        if not isinstance(other, Grid): return NotImplemented # e.g. a BitGrid compares itself
         return self.data == other.data
 
     def __hash__(self):
-        # return hash(str(self))
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        # The hash of the int with bit x * height + y set for each true cell
+        digits = ''.join([str(column) for column in self.data]).translate(_BIT_DIGITS)
+        return hash(int(digits[::-1] or '0', 2))
+
+    def __getstate__(self):
+        return (self.width, self.height, self.data)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # A Grid pickled before Grids were slotted, with lists of booleans
+            state = (state['width'], state['height'], [bytearray(column) for column in state['data']])
+        self.width, self.height, self.data = state
 
     def copy(self):
         g = Grid(self.width, self.height)
@@ -217,13 +242,15 @@ class Grid:
         return g
 
     def count(self, item =True ):
-        return sum([x.count(item) for x in self.data])
+        cell = chr(item)
+        return sum([x.count(cell) for x in self.data])
 
     def asList(self, key = True):
         list = []
         for x in range(self.width):
+            column = self.data[x]
             for y in range(self.height):
-                if self[x][y] == key: list.append( (x,y) )
+                if column[y] == key: list.append( (x,y) )
         return list
 
     def packBits(self):
@@ -274,6 +301,116 @@ class Grid:
                 bools.append(False)
         return bools
 
+class BitGrid(object):
+    """
+    A boolean Grid packed into a single Python int (a bitboard).  Cell (x,y)
+    is bit x * height + y, the same cell order Grid uses for packBits and
+    __hash__, so a BitGrid hashes like the Grid it was built from.
+
+    Reads work like a Grid (grid[x][y], count(), asList(), str()), but a
+    BitGrid is immutable: it is hashed into closed sets and shared between
+    states, so grid[x][y] = value raises an exception.  without(x, y)
+    returns a BitGrid with one cell cleared instead, and copy() is O(1).
+    """
+    __slots__ = ('width', 'height', 'bits')
+
+    def __init__(self, width, height, bits=0):
+        self.width = width
+        self.height = height
+        self.bits = bits
+
+    def fromGrid(grid):
+        "Packs a boolean Grid into a BitGrid."
+        bits, base = 0, 1
+        for column in grid.data:
+            for cell in column:
+                if cell:
+                    bits |= base
+                base <<= 1
+        return BitGrid(grid.width, grid.height, bits)
+    fromGrid = staticmethod(fromGrid)
+
+    def toGrid(self):
+        "Unpacks into an ordinary Grid."
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g.data[x][y] = True
+        return g
+
+    def __getitem__(self, x):
+        return _BitGridColumn(self, x)
+
+    def get(self, x, y):
+        return (self.bits >> (x * self.height + y)) & 1 == 1
+
+    def without(self, x, y):
+        """
+        Returns a BitGrid with cell (x,y) cleared.  If it is already clear
+        that is this BitGrid itself, which is safe to share as it never changes.
+        """
+        mask = 1 << (x * self.height + y)
+        if self.bits & mask:
+            return BitGrid(self.width, self.height, self.bits & ~mask)
+        return self
+
+    def __str__(self):
+        out = [[str(self.get(x, y))[0] for x in range(self.width)] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if isinstance(other, Grid): other = BitGrid.fromGrid(other)
+        if not isinstance(other, BitGrid): return False
+        return self.bits == other.bits and self.width == other.width and self.height == other.height
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def copy(self):
+        return BitGrid(self.width, self.height, self.bits)
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item=True):
+        n = bin(self.bits).count('1')
+        if item: return n
+        return self.width * self.height - n
+
+    def asList(self, key=True):
+        if not key: return self.toGrid().asList(False)
+        list = []
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            list.append((index / self.height, index % self.height))
+            bits ^= low
+        return list
+
+    def packBits(self):
+        return self.toGrid().packBits()
+
+class _BitGridColumn(object):
+    "The grid[x] view of a BitGrid, so that grid[x][y] reads cells."
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        return self.grid.get(self.x, y)
+
+    def __setitem__(self, y, value):
+        raise Exception('BitGrids are immutable; use without(x, y) or toGrid()')
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
         return bitRep
@@ -299,6 +436,15 @@ class Actions:
 
     TOLERANCE = .001
 
+    # Walls -> ActionTable, and the walls and table used last
+    # ActionTables by the identity of the walls Grid they were asked for
+    # (id -> (weak reference to the walls, table)), and by wall contents, so
+    # that copies of a layout share one; both only last as long as the walls
+    _tablesByWalls = {}
+    _tablesByContents = weakref.WeakValueDictionary()
+    _lastWalls = None
+    _lastTable = None
+
     def reverseDirection(action):
         if action == Directions.NORTH:
             return Directions.SOUTH
@@ -329,7 +475,38 @@ class Actions:
         return (dx * speed, dy * speed)
     directionToVector = staticmethod(directionToVector)
 
+    def getActionTable(walls):
+        """
+        Returns the ActionTable for a walls Grid, building it the first time
+        walls like these are seen.  A Grid seen before is found by identity in
+        O(1); only a new one is compared by contents.  Tables are dropped once
+        no walls that use them are left.  Walls must not be changed once used.
+        """
+        if walls is Actions._lastWalls: return Actions._lastTable
+        wallsId = id(walls)
+        entry = Actions._tablesByWalls.get(wallsId)
+        if entry != None and entry[0]() is walls:
+            table = entry[1]
+        else:
+            key = (walls.width, walls.height, ''.join([str(column) for column in walls.data]))
+            table = Actions._tablesByContents.get(key)
+            if table == None:
+                table = Actions._tablesByContents[key] = ActionTable(walls)
+            tablesByWalls = Actions._tablesByWalls
+            def forget(ref):
+                if tablesByWalls.get(wallsId, (None,))[0] is ref: del tablesByWalls[wallsId]
+            tablesByWalls[wallsId] = (weakref.ref(walls, forget), table)
+        Actions._lastWalls, Actions._lastTable = walls, table
+        return table
+    getActionTable = staticmethod(getActionTable)
+
     def getPossibleActions(config, walls):
+        legal = Actions.getActionTable(walls).legal.get(config.pos)
+        if legal != None: return list(legal)
+        return Actions._computePossibleActions(config, walls)
+    getPossibleActions = staticmethod(getPossibleActions)
+
+    def _computePossibleActions(config, walls):
         possible = []
         x, y = config.pos
         x_int, y_int = int(x + 0.5), int(y + 0.5)
@@ -346,9 +523,16 @@ class Actions:
 
         return possible
 
-    getPossibleActions = staticmethod(getPossibleActions)
+    _computePossibleActions = staticmethod(_computePossibleActions)
 
     def getLegalNeighbors(position, walls):
+        x, y = position
+        neighbors = Actions.getActionTable(walls).neighbors.get((int(x + 0.5), int(y + 0.5)))
+        if neighbors != None: return list(neighbors)
+        return Actions._computeLegalNeighbors(position, walls)
+    getLegalNeighbors = staticmethod(getLegalNeighbors)
+
+    def _computeLegalNeighbors(position, walls):
         x,y = position
         x_int, y_int = int(x + 0.5), int(y + 0.5)
         neighbors = []
@@ -360,7 +544,7 @@ class Actions:
             if next_y < 0 or next_y == walls.height: continue
             if not walls[next_x][next_y]: neighbors.append((next_x, next_y))
         return neighbors
-    getLegalNeighbors = staticmethod(getLegalNeighbors)
+    _computeLegalNeighbors = staticmethod(_computeLegalNeighbors)
 
     def getSuccessor(position, action):
         dx, dy = Actions.directionToVector(action)
@@ -368,21 +552,107 @@ class Actions:
         return (x + dx, y + dy)
     getSuccessor = staticmethod(getSuccessor)
 
-class GameStateData:
+class ActionTable:
     """
+    The moves allowed by one set of walls, worked out once, since walls never
+    change during a game (see Actions.getActionTable):
 
+      legal:      grid point -> the actions getPossibleActions allows there
+      successors: grid point -> {action: the grid point it leads to}
+      neighbors:  cell -> the cells getLegalNeighbors returns for it
+
+    Agents between grid points (scared ghosts, moving at half speed) are not
+    in the table and are handled as before.
     """
+    def __init__(self, walls):
+        self.legal = {}
+        self.successors = {}
+        self.neighbors = {}
+        for x in range(walls.width):
+            for y in range(walls.height):
+                self.neighbors[(x, y)] = tuple(Actions._computeLegalNeighbors((x, y), walls))
+                if walls[x][y]: continue
+                try:
+                    legal = Actions._computePossibleActions(Configuration((x, y), Directions.STOP), walls)
+                except IndexError:
+                    continue # An open cell on the edge of the layout
+                self.legal[(x, y)] = tuple(legal)
+                successors = {}
+                for action in legal:
+                    dx, dy = Actions._directions[action]
+                    successors[action] = (x + dx, y + dy)
+                self.successors[(x, y)] = successors
+
+_zobristKeys = {}
+_zobristRandom = random.Random(0)
+
+def zobristKey(feature):
+    """
+    Returns the random key of one feature of a state (a tuple such as
+    ('food', x, y)), always the same for the same feature.  Keys are drawn
+    from one generator as features are first seen, so no two features
+    share a key, but they differ between processes (which is why hashes
+    are not pickled).
+    """
+    key = _zobristKeys.get(feature)
+    if key == None:
+        key = _zobristKeys[feature] = _zobristRandom.getrandbits(62)
+    return key
+
+class GameStateData(object):
+    """
+    The data of a GameState.  Successors share it copy on write: the food,
+    capsules, layout, _eaten list and agent states of a new GameStateData are
+    its predecessor's own objects, and the game rules replace whatever they
+    change rather than editing it in place (getWritableAgentState copies an
+    agent state the first time it is changed, and removeFood only the food
+    column it changes).  deepCopy shares the food and capsules too, so the
+    GameState accessors that hand them out copy them first with
+    getWritableFood and getWritableCapsules, on whichever side of the copy
+    asks first.  Code outside the rules should treat everything else,
+    including the layout and its walls, as read only.
+
+    States hash by Zobrist keys: the XOR of a key for every pellet, every
+    capsule and every agent's position, direction and scared timer, kept up
+    to date as the rules change them, so hashing takes constant time.  Each
+    part remembers the object it was computed from and is recomputed from
+    scratch if that object has been replaced by other code.  deepCopy
+    hashes the state it copies first, so that the states a game plays
+    through, as well as those an agent searches, are hashed incrementally.
+    """
+    __slots__ = ('food', 'capsules', 'agentStates', 'layout', '_eaten', 'score', 'scoreChange', '_owned',
+                 '_ownsFood', '_ownsCapsules',
+                 '_foodEaten', '_foodAdded', '_capsuleEaten', '_agentMoved', '_lose', '_win',
+                 '_foodHash', '_hashedFood', '_capsuleHash', '_hashedCapsules', '_agentHash', '_unhashed',
+                 '_hashedAgents')
+
     def __init__( self, prevState = None ):
         """
-        Generates a new data packet by copying information from its predecessor.
+        Generates a new data packet sharing its predecessor's information.
         """
+        self._owned = 0 # Bit i is set once agentStates[i] belongs to this data alone
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates( prevState.agentStates )
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            prevState._owned = 0 # its agent states are now shared too
+            # Food and capsules are only ever shared with the other side of a deepCopy
+            self._ownsFood = prevState._ownsFood
+            self._ownsCapsules = prevState._ownsCapsules
+
+            self._foodHash, self._hashedFood = prevState._foodHash, prevState._hashedFood
+            self._capsuleHash, self._hashedCapsules = prevState._capsuleHash, prevState._hashedCapsules
+            self._agentHash, self._unhashed = prevState._agentHash, prevState._unhashed
+            if prevState._hashedAgents is not prevState.agentStates: self._agentHash = None
+            self._hashedAgents = self.agentStates
+        else:
+            self._ownsFood = self._ownsCapsules = False
+            self._foodHash, self._hashedFood = 0, None
+            self._capsuleHash, self._hashedCapsules = 0, None
+            self._agentHash, self._unhashed, self._hashedAgents = None, 0, None
 
         self._foodEaten = None
         self._foodAdded = None
@@ -393,9 +663,22 @@ class GameStateData:
         self.scoreChange = 0
 
     def deepCopy( self ):
+        """
+        A copy that can be handed to an agent: its agent states are its own,
+        and it shares the layout, food and capsules, which neither it nor this
+        data owns from then on, so that the first of them to hand them out
+        copies them (see getWritableFood).  An agent that edits them cannot
+        change the game.  The cached hashes carry over.
+        """
+        hash( self ) # so that this state and its successors keep the hash up to date
+        owned = self._owned
         state = GameStateData( self )
-        state.food = self.food.deepCopy()
-        state.layout = self.layout.deepCopy()
+        self._owned = owned # the copy has agent states of its own
+        state.agentStates = self.copyAgentStates( self.agentStates )
+        state._owned = (1 << len( state.agentStates )) - 1
+        self._ownsFood = state._ownsFood = False
+        self._ownsCapsules = state._ownsCapsules = False
+        state._hashedAgents = state.agentStates
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
         state._foodAdded = self._foodAdded
@@ -408,6 +691,72 @@ class GameStateData:
             copiedStates.append( agentState.copy() )
         return copiedStates
 
+    def getWritableAgentState( self, index ):
+        """
+        Returns agentStates[index] for the rules to change, first replacing it
+        with a copy if it may be shared with another GameStateData.
+        """
+        if not self._unhashed >> index & 1 and self._agentHash != None:
+            # Take its key out of the hash until it is next hashed
+            self._agentHash ^= self._agentKey(index)
+            self._unhashed |= 1 << index
+        if not self._owned >> index & 1:
+            self.agentStates[index] = self.agentStates[index].copy()
+            self._owned |= 1 << index
+        return self.agentStates[index]
+
+    def getWritableFood( self ):
+        """
+        Returns the food Grid for code outside the rules to read or change,
+        first replacing it with a copy if it is shared with the other side of
+        a deepCopy.
+        """
+        if not self._ownsFood:
+            food = self.food.copy()
+            if self._hashedFood is self.food: self._hashedFood = food
+            self.food = food
+            self._ownsFood = True
+        return self.food
+
+    def getWritableCapsules( self ):
+        "Like getWritableFood, for the capsule list."
+        if not self._ownsCapsules:
+            capsules = self.capsules[:]
+            if self._hashedCapsules is self.capsules: self._hashedCapsules = capsules
+            self.capsules = capsules
+            self._ownsCapsules = True
+        return self.capsules
+
+    def removeFood( self, position ):
+        """
+        Replaces the food Grid with one without the pellet at position, which
+        shares every column but that one with the old Grid.
+        """
+        x, y = position
+        food = self.food.shallowCopy()
+        food.data = food.data[:]
+        food.data[x] = food.data[x][:]
+        food[x][y] = False
+        if self._hashedFood is self.food:
+            self._foodHash ^= zobristKey(('food', x, y))
+            self._hashedFood = food
+        self.food = food
+
+    def removeCapsule( self, position ):
+        "Replaces the capsule list with a copy without the capsule at position."
+        capsules = self.capsules[:]
+        capsules.remove( position )
+        if self._hashedCapsules is self.capsules:
+            self._capsuleHash ^= zobristKey(('capsule',) + tuple(position))
+            self._hashedCapsules = capsules
+        self.capsules = capsules
+
+    def _agentKey( self, index ):
+        agentState = self.agentStates[index]
+        conf = agentState.configuration
+        if conf == None: return zobristKey(('agent', index, None))
+        return zobristKey(('agent', index, conf.pos, conf.direction)) ^ zobristKey(('scared', index, agentState.scaredTimer))
+
     def __eq__( self, other ):
         """
         Allows two states to be compared.
@@ -424,17 +773,42 @@ class GameStateData:
         """
         Allows states to be keys of dictionaries.
         """
-        for i, state in enumerate( self.agentStates ):
-            try:
-                int(hash(state))
-            except TypeError, e:
-                print e
-                #hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+        if self._hashedFood is not self.food:
+            self._foodHash = 0
+            for x, y in self.food.asList():
+                self._foodHash ^= zobristKey(('food', x, y))
+            self._hashedFood = self.food
+        if self._hashedCapsules is not self.capsules:
+            self._capsuleHash = 0
+            for position in self.capsules:
+                self._capsuleHash ^= zobristKey(('capsule',) + tuple(position))
+            self._hashedCapsules = self.capsules
+        if self._agentHash == None or self._hashedAgents is not self.agentStates:
+            self._agentHash = 0
+            for index in range( len( self.agentStates ) ):
+                self._agentHash ^= self._agentKey(index)
+            self._hashedAgents = self.agentStates
+            self._unhashed = 0
+        while self._unhashed:
+            index = self._unhashed.bit_length() - 1
+            self._agentHash ^= self._agentKey(index)
+            self._unhashed ^= 1 << index
+        return self._foodHash ^ self._capsuleHash ^ self._agentHash ^ hash(self.score)
+
+    def __getstate__( self ):
+        state = dict([(name, getattr(self, name)) for name in self.__slots__ if hasattr(self, name)])
+        # Zobrist keys differ between processes, so hashes start again from scratch
+        state.update(_foodHash=0, _hashedFood=None, _capsuleHash=0, _hashedCapsules=None,
+                     _agentHash=None, _unhashed=0, _hashedAgents=None)
+        return state
+
+    def __setstate__( self, state ):
+        self._ownsFood = self._ownsCapsules = False
+        for name, value in state.items(): setattr(self, name, value)
 
     def __str__( self ):
         width, height = self.layout.width, self.layout.height
-        map = Grid(width, height)
+        map = [[' '] * height for x in range(width)]
         if type(self.food) == type((1,2)):
             self.food = reconstituteGrid(self.food)
         for x in range(width):
@@ -455,7 +829,9 @@ class GameStateData:
         for x, y in self.capsules:
             map[x][y] = 'o'
 
-        return str(map) + ("\nScore: %d\n" % self.score)
+        out = [[map[x][y] for x in range(width)] for y in range(height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out]) + ("\nScore: %d\n" % self.score)
 
     def _foodWallStr( self, hasFood, hasWall ):
         if hasFood:
@@ -503,6 +879,10 @@ class GameStateData:
                 else: numGhosts += 1
             self.agentStates.append( AgentState( Configuration( pos, Directions.STOP), isPacman) )
         self._eaten = [False for a in self.agentStates]
+        self._owned = (1 << len(self.agentStates)) - 1
+        self._ownsFood = self._ownsCapsules = True
+        self._hashedFood = self._hashedCapsules = self._agentHash = None
+        self._unhashed = 0
 
 try:
     import boinc
@@ -0,0 +1,86 @@
+# jpsBenchmark.py
+# ---------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Benchmark of search.jumpPointSearch against search.aStarSearch, both with
+the Manhattan heuristic, on random start / goal pairs in every layout in
+the layouts directory (or just the ones given with -l):
+
+> python jpsBenchmark.py
+> python jpsBenchmark.py -l openMaze,bigMaze -n 200
+
+Every pair is checked to get a path of the same length from both searches.
+"""
+
+import os
+import random
+import time
+import optparse
+
+import layout
+import pacman
+import search
+import searchAgents
+
+def runPairs(gameState, pairs, searchFunction):
+    "Returns (path lengths, nodes expanded, seconds) over all the pairs."
+    lengths, expanded = [], 0
+    start = time.time()
+    for a, b in pairs:
+        problem = searchAgents.PositionSearchProblem(gameState, start=a, goal=b, warn=False, visualize=False)
+        actions = searchFunction(problem, heuristic=searchAgents.manhattanHeuristic)
+        lengths.append(None if actions == None else len(actions))
+        expanded += problem._expanded
+    return lengths, expanded, time.time() - start
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='Comma separated layouts to search [Default: every layout]')
+    parser.add_option('-n', '--pairs', dest='pairs', type='int', default=50,
+                      help='Random start / goal pairs per layout [Default: %default]')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0,
+                      help='Random seed for the pairs [Default: %default]')
+    options, _ = parser.parse_args()
+
+    if options.layouts == None:
+        names = sorted([f[:-4] for f in os.listdir('layouts') if f.endswith('.lay')])
+    else:
+        names = options.layouts.split(',')
+
+    print '%-18s %9s %9s %9s %9s %9s %8s' % \
+        ('layout', 'A* nodes', 'JPS nodes', 'A*(s)', 'JPS(s)', 'speedup', 'agree')
+    totals = [0, 0, 0.0, 0.0]
+    for name in names:
+        lay = layout.getLayout(name)
+        if lay == None: raise Exception('The layout ' + name + ' cannot be found')
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        cells = lay.walls.asList(False)
+        rand = random.Random(options.seed)
+        pairs = [(rand.choice(cells), rand.choice(cells)) for i in range(options.pairs)]
+
+        astarLengths, astarExpanded, astarTime = runPairs(gameState, pairs, search.aStarSearch)
+        jpsLengths, jpsExpanded, jpsTime = runPairs(gameState, pairs, search.jumpPointSearch)
+        agree = len([1 for a, j in zip(astarLengths, jpsLengths) if a == j])
+        print '%-18s %9d %9d %9.3f %9.3f %8.1fx %4d/%-4d' % \
+            (name, astarExpanded, jpsExpanded, astarTime, jpsTime,
+             astarTime / max(jpsTime, 1e-9), agree, len(pairs))
+        for i, value in enumerate([astarExpanded, jpsExpanded, astarTime, jpsTime]):
+            totals[i] += value
+    print '%-18s %9d %9d %9.3f %9.3f %8.1fx' % \
+        (('total',) + tuple(totals) + (totals[2] / max(totals[3], 1e-9),))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# mazeGraph.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+This file contains a MazeGraph: the walls of a layout compiled once into
+the graph of moves between open cells, which the search problems in
+searchAgents.py use instead of re-deriving moves from the walls on every
+getSuccessors call.
+
+Every open cell gets an integer id, and the moves out of cell i are entries
+offsets[i] to offsets[i + 1] of the parallel arrays targets (cell ids) and
+actions (compressed sparse row form).  Moves are listed North, South, East,
+West, the order getSuccessors has always used.  For the search problems,
+which work with positions, the same moves are also kept as ready-made
+tuples of (next position, action) per position.  Graphs are shared between
+every problem on the same walls.
+
+Example:
+graph = getMazeGraph(gameState.getWalls())
+for next, action in graph.moves[(1, 1)]: ...
+"""
+
+import weakref
+from array import array
+from game import Directions
+
+# In the order successors are generated
+DIRECTIONS = [(Directions.NORTH, (0, 1)), (Directions.SOUTH, (0, -1)),
+              (Directions.EAST, (1, 0)), (Directions.WEST, (-1, 0))]
+
+ORDER = dict((action, i) for i, (action, vector) in enumerate(DIRECTIONS))
+
+REVERSE = {Directions.NORTH: Directions.SOUTH, Directions.SOUTH: Directions.NORTH,
+           Directions.EAST: Directions.WEST, Directions.WEST: Directions.EAST}
+
+class MazeGraph:
+    def __init__(self, walls):
+        self.width = walls.width
+        self.height = walls.height
+        self.cells = walls.asList(False)
+        self.cellIds = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.numCells = len(self.cells)
+
+        self.offsets = array('l', [0])
+        self.targets = array('l')
+        self.actions = []
+        for x, y in self.cells:
+            for action, (dx, dy) in DIRECTIONS:
+                next = self.cellIds.get((x + dx, y + dy))
+                if next != None:
+                    self.targets.append(next)
+                    self.actions.append(action)
+            self.offsets.append(len(self.targets))
+
+        # position -> ((next position, action), ...), and
+        # position -> ((previous position, action leading here), ...)
+        self.moves = {}
+        self.reverseMoves = {}
+        for i, cell in enumerate(self.cells):
+            span = range(self.offsets[i], self.offsets[i + 1])
+            self.moves[cell] = tuple([(self.cells[self.targets[k]], self.actions[k]) for k in span])
+            reverse = [(self.cells[self.targets[k]], REVERSE[self.actions[k]]) for k in span]
+            reverse.sort(key=lambda move: ORDER[move[1]])
+            self.reverseMoves[cell] = tuple(reverse)
+
+    def neighbors(self, i):
+        "Returns the ids of the cells one move away from the cell with id i."
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+# MazeGraphs by the identity of the walls Grid they were asked for (id ->
+# (weak reference to the walls, graph)), and by wall contents, so that copies
+# of a layout share one; both only last as long as the walls (see
+# Actions.getActionTable in game.py)
+graphsByWalls = {}
+graphsByContents = weakref.WeakValueDictionary()
+_lastWalls = None
+_lastGraph = None
+
+def getMazeGraph(walls):
+    """
+    Returns the MazeGraph for a walls Grid, compiling it the first time a
+    layout with these walls is seen.  Every state of a game shares its
+    layout's walls, so asking again with the same Grid is O(1); only a new
+    Grid is compared by contents.  Graphs are dropped once no walls that
+    use them are left.
+    """
+    global _lastWalls, _lastGraph
+    if walls is _lastWalls: return _lastGraph
+    wallsId = id(walls)
+    entry = graphsByWalls.get(wallsId)
+    if entry != None and entry[0]() is walls:
+        graph = entry[1]
+    else:
+        key = (walls.width, walls.height, ''.join([str(column) for column in walls.data]))
+        graph = graphsByContents.get(key)
+        if graph == None:
+            graph = graphsByContents[key] = MazeGraph(walls)
+        byWalls = graphsByWalls
+        def forget(ref):
+            if byWalls.get(wallsId, (None,))[0] is ref: del byWalls[wallsId]
+        byWalls[wallsId] = (weakref.ref(walls, forget), graph)
+    _lastWalls, _lastGraph = walls, graph
+    return graph
@@ -0,0 +1,163 @@
+# patternDatabase.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Disjoint additive pattern databases for the sliding tile puzzles in
+eightpuzzle.py.
+
+A pattern is a subset of the tiles.  Its database holds, for every way of
+placing those tiles on the board, the fewest moves *of pattern tiles* needed
+to bring them home, with the other tiles ignored.  Since each move moves one
+tile, the values of databases over disjoint patterns can be added up and
+still never overestimate the true distance.
+
+A database is built once by a backward breadth first search from the goal
+and written to a raw byte file in DATABASE_DIR; later runs memory-map that
+file instead of rebuilding it.  Entries are indexed by the pattern tiles'
+cells, 4 bits each, in the order the tiles are listed.
+
+Example:
+heuristic = getAdditiveHeuristic(4)
+heuristic.estimate(state.tilePositions())
+"""
+
+import os
+import mmap
+from collections import deque
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patternDatabases')
+
+# Default partitions of the tiles into patterns, by board size.  The
+# 15-puzzle uses the usual 5-5-5 split into compact blocks.
+PARTITIONS = {3: [(1, 2, 3, 4), (5, 6, 7, 8)],
+              4: [(1, 2, 3, 5, 6), (4, 8, 9, 12, 13), (7, 10, 11, 14, 15)]}
+
+UNSEEN = 255
+
+def boardNeighbors(size):
+    "Returns, for each cell of a size x size board, the cells next to it."
+    neighbors = []
+    for cell in range(size * size):
+        row, col = divmod(cell, size)
+        adjacent = []
+        if row > 0: adjacent.append(cell - size)
+        if row < size - 1: adjacent.append(cell + size)
+        if col > 0: adjacent.append(cell - 1)
+        if col < size - 1: adjacent.append(cell + 1)
+        neighbors.append(adjacent)
+    return neighbors
+
+def buildPatternDatabase(size, tiles):
+    """
+    Returns a bytearray holding the database for the given pattern tiles.
+
+    The search runs backwards from the goal over states made of the
+    pattern tiles' cells plus the blank's cell.  Moving the blank onto a
+    non-pattern cell is free and moving a pattern tile costs 1, so a 0-1
+    breadth first search settles states in order of cost, and the first
+    time a placement of the tiles is settled, with the blank anywhere, is
+    its entry.
+    """
+    neighbors = boardNeighbors(size)
+    k = len(tiles)
+    shifts = [4 * (j + 1) for j in range(k)]
+    table = bytearray([UNSEEN]) * (1 << (4 * k))
+    costs = bytearray([UNSEEN]) * (1 << (4 * (k + 1))) # (pattern cells, blank cell) -> cost
+
+    # The goal has tile t in cell t and the blank in cell 0
+    start = 0
+    for j, tile in enumerate(tiles):
+        start |= tile << shifts[j]
+    costs[start] = 0
+    queue = deque([start])
+    while queue:
+        index = queue.popleft()
+        cost = costs[index]
+        if table[index >> 4] == UNSEEN:
+            table[index >> 4] = cost
+
+        blank = index & 15
+        occupied = {}
+        for j in range(k):
+            occupied[(index >> shifts[j]) & 15] = shifts[j]
+        for cell in neighbors[blank]:
+            shift = occupied.get(cell)
+            if shift == None:
+                next, nextCost = index - blank + cell, cost
+            else:
+                # The pattern tile in cell slides into the blank's cell
+                next = index - (cell << shift) + (blank << shift) - blank + cell
+                nextCost = cost + 1
+            if nextCost < costs[next]:
+                costs[next] = nextCost
+                if shift == None:
+                    queue.appendleft(next)
+                else:
+                    queue.append(next)
+    return table
+
+class PatternDatabase:
+    """
+    The database for one pattern on a size x size board, memory-mapped from
+    its file in directory (built and saved first if the file is missing).
+    """
+    def __init__(self, size, tiles, directory=DATABASE_DIR):
+        self.size = size
+        self.tiles = tuple(tiles)
+        self.path = os.path.join(directory, 'pattern-%dx%d-%s.bin' %
+                                 (size, size, '-'.join([str(t) for t in self.tiles])))
+        if not os.path.exists(self.path):
+            if not os.path.isdir(directory): os.makedirs(directory)
+            table = buildPatternDatabase(size, self.tiles)
+            temporary = self.path + '.tmp'
+            output = open(temporary, 'wb')
+            output.write(table)
+            output.close()
+            os.rename(temporary, self.path)
+        input = open(self.path, 'rb')
+        self.table = mmap.mmap(input.fileno(), 0, access=mmap.ACCESS_READ)
+        input.close()
+
+    def lookup(self, positions):
+        "positions[t] is the cell of tile t."
+        index = 0
+        shift = 0
+        for tile in self.tiles:
+            index |= positions[tile] << shift
+            shift += 4
+        return ord(self.table[index])
+
+class AdditiveHeuristic:
+    """
+    The sum of the pattern databases over a partition of the tiles, which is
+    an admissible and consistent estimate of the moves left.
+    """
+    def __init__(self, size, partition=None, directory=DATABASE_DIR):
+        if partition == None: partition = PARTITIONS[size]
+        self.databases = [PatternDatabase(size, tiles, directory) for tiles in partition]
+
+    def estimate(self, positions):
+        "positions[t] is the cell of tile t."
+        return sum([database.lookup(positions) for database in self.databases])
+
+heuristicMap = {}
+
+def getAdditiveHeuristic(size):
+    """
+    Returns the AdditiveHeuristic over the default partition for a board
+    size, loading (or building) its databases the first time it is asked for.
+    """
+    if size not in heuristicMap:
+        heuristicMap[size] = AdditiveHeuristic(size)
+    return heuristicMap[size]
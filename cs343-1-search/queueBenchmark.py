@@ -0,0 +1,175 @@
+# queueBenchmark.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Microbenchmark for the frontier containers in util.py.
+
+Compares util.PriorityQueue (indexed, O(log n) update) against the old
+linear-scan implementation, both on uniform cost searches over real maze
+frontiers and on synthetic decrease-key workloads of growing size:
+
+> python queueBenchmark.py
+> python queueBenchmark.py -l bigMaze,openMaze,mediumMaze -s 1000,10000
+"""
+
+import heapq
+import random
+import time
+import optparse
+
+import util
+import layout
+
+class LinearScanPriorityQueue:
+    "The original util.PriorityQueue, kept here as a baseline."
+    def  __init__(self):
+        self.heap = []
+        self.count = 0
+
+    def push(self, item, priority):
+        entry = (priority, self.count, item)
+        heapq.heappush(self.heap, entry)
+        self.count += 1
+
+    def pop(self):
+        (_, _, item) = heapq.heappop(self.heap)
+        return item
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def update(self, item, priority):
+        for index, (p, c, i) in enumerate(self.heap):
+            if i == item:
+                if p <= priority:
+                    break
+                del self.heap[index]
+                self.heap.append((priority, c, item))
+                heapq.heapify(self.heap)
+                break
+        else:
+            self.push(item, priority)
+
+class ListQueue:
+    "The original util.Queue, kept here as a baseline."
+    def __init__(self):
+        self.list = []
+
+    def push(self,item):
+        self.list.insert(0,item)
+
+    def pop(self):
+        return self.list.pop()
+
+    def isEmpty(self):
+        return len(self.list) == 0
+
+def mazeUniformCost(walls, start, queueClass):
+    """
+    Runs a uniform cost search from start over every reachable cell using
+    a StayEast-like cost function, so the frontier sees real update traffic.
+    Returns (cells expanded, update calls).
+    """
+    pq = queueClass()
+    pq.update(start, 0)
+    cost = {start: 0}
+    closed = set()
+    updates = 0
+    while not pq.isEmpty():
+        x, y = pq.pop()
+        closed.add((x, y))
+        for nx, ny in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+            if walls[nx][ny] or (nx, ny) in closed: continue
+            c = cost[(x, y)] + 1 + (ny % 3)
+            if (nx, ny) not in cost or c < cost[(nx, ny)]:
+                cost[(nx, ny)] = c
+                pq.update((nx, ny), c)
+                updates += 1
+    return len(closed), updates
+
+def mazeBreadthFirst(walls, start, queueClass):
+    q = queueClass()
+    q.push(start)
+    seen = set([start])
+    while not q.isEmpty():
+        x, y = q.pop()
+        for nxt in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+            if not walls[nxt[0]][nxt[1]] and nxt not in seen:
+                seen.add(nxt)
+                q.push(nxt)
+    return len(seen)
+
+def syntheticUpdates(size, queueClass, seed=0):
+    "Pushes size items, then issues size random decrease-key updates and drains."
+    rand = random.Random(seed)
+    pq = queueClass()
+    priorities = {}
+    for i in range(size):
+        priorities[i] = rand.randint(size, 10 * size)
+        pq.push(i, priorities[i])
+    for _ in range(size):
+        i = rand.randrange(size)
+        priorities[i] -= rand.randint(1, size)
+        pq.update(i, priorities[i])
+    while not pq.isEmpty():
+        pq.pop()
+
+def timeIt(fn, *args):
+    start = time.time()
+    result = fn(*args)
+    return time.time() - start, result
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-l', '--layouts', dest='layouts', default='mediumMaze,bigMaze,openMaze',
+                      help='Comma separated layouts to search [Default: %default]')
+    parser.add_option('-s', '--sizes', dest='sizes', default='500,1000,2000,4000,8000',
+                      help='Comma separated synthetic frontier sizes [Default: %default]')
+    parser.add_option('--skipBaseline', action='store_true', dest='skipBaseline', default=False,
+                      help='Only time the current util containers')
+    options, _ = parser.parse_args()
+
+    print '%-12s %8s %8s %12s %12s %8s' % ('layout', 'cells', 'updates', 'indexed(s)', 'linear(s)', 'speedup')
+    for name in options.layouts.split(','):
+        lay = layout.getLayout(name)
+        if lay == None: raise Exception('The layout ' + name + ' cannot be found')
+        start = lay.agentPositions[0][1]
+        fast, (cells, updates) = timeIt(mazeUniformCost, lay.walls, start, util.PriorityQueue)
+        if options.skipBaseline:
+            print '%-12s %8d %8d %12.4f' % (name, cells, updates, fast)
+            continue
+        slow, _ = timeIt(mazeUniformCost, lay.walls, start, LinearScanPriorityQueue)
+        print '%-12s %8d %8d %12.4f %12.4f %7.1fx' % (name, cells, updates, fast, slow, slow / max(fast, 1e-9))
+
+    print
+    print '%-12s %8s %12s %12s %8s' % ('layout', 'cells', 'deque(s)', 'list(s)', 'speedup')
+    for name in options.layouts.split(','):
+        lay = layout.getLayout(name)
+        start = lay.agentPositions[0][1]
+        fast, cells = timeIt(mazeBreadthFirst, lay.walls, start, util.Queue)
+        slow, _ = timeIt(mazeBreadthFirst, lay.walls, start, ListQueue)
+        print '%-12s %8d %12.4f %12.4f %7.1fx' % (name, cells, fast, slow, slow / max(fast, 1e-9))
+
+    print
+    print '%-12s %12s %12s %8s' % ('frontier', 'indexed(s)', 'linear(s)', 'speedup')
+    for size in [int(s) for s in options.sizes.split(',')]:
+        fast, _ = timeIt(syntheticUpdates, size, util.PriorityQueue)
+        if options.skipBaseline:
+            print '%-12d %12.4f' % (size, fast)
+            continue
+        slow, _ = timeIt(syntheticUpdates, size, LinearScanPriorityQueue)
+        print '%-12d %12.4f %12.4f %7.1fx' % (size, fast, slow, slow / max(fast, 1e-9))
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,13 @@ Pacman agents (in searchAgents.py).
 """
 
 import util
+import time
+import heapq
+import cPickle
+import itertools
+import multiprocessing
+import externalSearch
+from array import array
 
 class SearchProblem:
     """
@@ -86,85 +93,15 @@ def depthFirstSearch(problem):
     print "Is the start a goal?", problem.isGoalState(problem.getStartState())
     print "Start's successors:", problem.getSuccessors(problem.getStartState())
     """
-    stack = util.Stack()
-    stack.push(problem.getStartState())
-    back = {}
-    expanded = []
-
-    while not stack.isEmpty():
-        current = stack.pop()
-
-        if problem.isGoalState(current):
-            actions = []
-            while current != problem.getStartState():
-                actions.append(back[current][1])
-                current = back[current][0]
-            actions.reverse()
-            return actions
-
-        expanded.append(current)
-        for child in problem.getSuccessors(current):
-            coords = child[0]
-            if coords not in expanded:
-                stack.push(coords)
-                back[coords] = (current, child[1])
+    return graphSearch(problem, DEPTH_FIRST)
 
 def breadthFirstSearch(problem):
     """Search the shallowest nodes in the search tree first."""
-    start = problem.getStartState()
-    q = util.Queue()
-    q.push(start)
-    back = {}
-    back[start] = None
-
-    while not q.isEmpty():
-        current = q.pop()
-
-        if problem.isGoalState(current):
-            actions = []
-            while current != start:
-                actions.append(back[current][1]) # get the action
-                current = back[current][0]
-            actions.reverse()
-            return actions
-
-        for child in problem.getSuccessors(current):
-            state = child[0]
-            if state not in back:
-                q.push(state)
-                back[state] = (current, child[1])
+    return graphSearch(problem, BREADTH_FIRST)
 
 def uniformCostSearch(problem):
     """Search the node of least total cost first."""
-    pq = util.PriorityQueue()
-    pq.update(problem.getStartState(), 0)
-    back = {}
-    back[problem.getStartState()] = (None, None, 0)
-    expanded = []
-
-    if problem.isGoalState(problem.getStartState()):
-        return []
-
-    while not pq.isEmpty():
-        current = pq.pop()
-        currentCost = back[current][2]
-
-        if problem.isGoalState(current):
-            actions = []
-            while current != problem.getStartState():
-                actions.append(back[current][1])
-                current = back[current][0]
-            actions.reverse()
-            return actions
-
-        expanded.append(current)
-        for child in problem.getSuccessors(current):
-            coords = child[0]
-            if coords not in expanded:
-                cost = currentCost + child[2]
-                if not (coords in back and cost > back[coords][2]):
-                    pq.update(coords, cost)
-                    back[coords] = (current, child[1], cost)
+    return graphSearch(problem, BEST_FIRST)
 
 def nullHeuristic(state, problem=None):
     """
@@ -175,36 +112,963 @@ def nullHeuristic(state, problem=None):
 
 def aStarSearch(problem, heuristic=nullHeuristic):
     """Search the node that has the lowest combined cost and heuristic first."""
+    return graphSearch(problem, BEST_FIRST, heuristic)
+
+def weightedAStarSearch(problem, heuristic=nullHeuristic, weight=2.0):
+    """
+    Search the node with the lowest cost + weight * heuristic first.  With an
+    admissible heuristic the path costs at most weight times the optimum.
+    """
+    return graphSearch(problem, BEST_FIRST, heuristic, float(weight))
+
+def greedyBestFirstSearch(problem, heuristic=nullHeuristic):
+    """Search the node with the lowest heuristic first, ignoring path cost."""
+    return graphSearch(problem, BEST_FIRST, heuristic, INFINITY)
+
+# Generator versions of the searches above, for watching a search or stopping
+# it early (see iterGraphSearch and SearchEvent below), e.g.
+#
+#   for event in iterAStarSearch(problem, heuristic, maxExpansions=10000):
+#       if event.done: return event.actions
+
+def iterDepthFirstSearch(problem, **limits):
+    return iterGraphSearch(problem, DEPTH_FIRST, **limits)
+
+def iterBreadthFirstSearch(problem, **limits):
+    return iterGraphSearch(problem, BREADTH_FIRST, **limits)
+
+def iterUniformCostSearch(problem, **limits):
+    return iterGraphSearch(problem, BEST_FIRST, **limits)
+
+def iterAStarSearch(problem, heuristic=nullHeuristic, **limits):
+    return iterGraphSearch(problem, BEST_FIRST, heuristic, **limits)
+
+###############################
+# Shared graph search engine  #
+###############################
+
+DEPTH_FIRST = 'depthFirst'
+BREADTH_FIRST = 'breadthFirst'
+BEST_FIRST = 'bestFirst'
+
+INFINITY = float('inf')
+
+class SearchStats:
+    """
+    Bookkeeping for one call to graphSearch: nodes expanded, states
+    generated, the largest the frontier got and the wall clock time taken.
+    """
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.maxFrontier = 0
+        self.startTime = time.time()
+        self.elapsed = 0.0
+
+    def __str__(self):
+        return 'expanded %d, generated %d, peak frontier %d in %.3f seconds' % \
+            (self.expanded, self.generated, self.maxFrontier, self.elapsed)
+
+# Statistics of the most recent graphSearch call (see SearchStats)
+lastSearchStats = None
+
+class SearchEvent(object):
+    """
+    What iterGraphSearch yields.  While searching, one event per expansion:
+    the state expanded, its path cost g, its priority f (g + weight * h for
+    best first searches, g otherwise), the frontier size and the number of
+    nodes expanded so far.
+
+    The last event has done set.  Its actions are the path found, or None
+    when there is none; stopped then says why the search ended early
+    ('cancelled' or 'budget'), if it did.
+    """
+    __slots__ = ('state', 'g', 'f', 'frontier', 'expanded', 'done', 'actions', 'stopped')
+
+    def __init__(self, state, g, f, frontier, expanded, done=False, actions=None, stopped=None):
+        self.state = state
+        self.g = g
+        self.f = f
+        self.frontier = frontier
+        self.expanded = expanded
+        self.done = done
+        self.actions = actions
+        self.stopped = stopped
+
+def graphSearch(problem, strategy, heuristic=nullHeuristic, weight=1):
+    """
+    The engine behind dfs, bfs, ucs and astar: runs iterGraphSearch to the
+    end and returns its path (see there).
+    """
+    for event in iterGraphSearch(problem, strategy, heuristic, weight, reportExpansions=False):
+        pass
+    return event.actions
+
+def iterGraphSearch(problem, strategy, heuristic=nullHeuristic, weight=1,
+                    maxExpansions=None, cancel=None, reportExpansions=True):
+    """
+    A generator that runs a graph search and yields a SearchEvent for every
+    node expanded (unless reportExpansions is False), then a final one with
+    done set and the path found.  Callers can watch the search as it goes,
+    and stop it early by passing a node budget (maxExpansions), cancelling
+    a util.CancellationToken, or simply no longer asking for events.
+
+    Every state is interned to a small integer the first time it is
+    generated.  The frontier then only holds ints, the closed set is a
+    bytearray and the search tree is kept as parallel parent / action
+    arrays indexed by id, so membership tests are O(1) and the path is
+    rebuilt by walking integers back to the start.
+
+      strategy: DEPTH_FIRST, BREADTH_FIRST or BEST_FIRST
+      heuristic: only used by BEST_FIRST; priorities are g + weight * h,
+        or h alone when weight is INFINITY
+
+    Statistics for the run are left in search.lastSearchStats.
+    """
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+    limited = maxExpansions != None or cancel != None
+
+    start = problem.getStartState()
+    ids = {start: 0}                # state -> id
+    states = [start]                # id -> state
+    parent = array('l', [-1])       # id -> id of the node that generated it
+    parentAction = array('l', [-1]) # id -> index into actionTable
+    actionIds, actionTable = {}, []
+    closed = bytearray(1)           # id -> 1 once the node has been expanded
+    costs = [0]                     # id -> best known path cost
+
+    if strategy == BEST_FIRST:
+        costWeight = 0 if weight == INFINITY else 1
+        if weight == INFINITY: weight = 1
+        frontier = util.PriorityQueue()
+        frontier.push(0, weight * heuristic(start, problem))
+    elif strategy == DEPTH_FIRST:
+        frontier = util.Stack()
+        frontier.push(0)
+    elif strategy == BREADTH_FIRST:
+        frontier = util.Queue()
+        frontier.push(0)
+    else:
+        raise Exception('Unknown search strategy: ' + str(strategy))
+
+    try:
+        while not frontier.isEmpty():
+            if limited:
+                if cancel != None and cancel.isCancelled():
+                    yield SearchEvent(None, None, None, len(frontier), stats.expanded, True, None, 'cancelled')
+                    return
+                if maxExpansions != None and stats.expanded >= maxExpansions:
+                    yield SearchEvent(None, None, None, len(frontier), stats.expanded, True, None, 'budget')
+                    return
+            if reportExpansions and strategy == BEST_FIRST: f = frontier.peekPriority()
+            current = frontier.pop()
+            currentState = states[current]
+            currentCost = costs[current]
+
+            if problem.isGoalState(currentState):
+                actions = []
+                node = current
+                while node != 0:
+                    actions.append(actionTable[parentAction[node]])
+                    node = parent[node]
+                actions.reverse()
+                stats.elapsed = time.time() - stats.startTime
+                yield SearchEvent(currentState, currentCost, currentCost, len(frontier), stats.expanded, True, actions)
+                return
+
+            closed[current] = 1
+            stats.expanded += 1
+
+            for state, action, stepCost in problem.getSuccessors(currentState):
+                child = ids.get(state)
+                if child is None:
+                    child = len(states)
+                    ids[state] = child
+                    states.append(state)
+                    parent.append(current)
+                    parentAction.append(0)
+                    closed.append(0)
+                    costs.append(None)
+                    stats.generated += 1
+                elif closed[child] or strategy == BREADTH_FIRST:
+                    continue
+
+                cost = currentCost + stepCost
+                if strategy == BEST_FIRST:
+                    if costs[child] is not None and cost > costs[child]: continue
+                    frontier.update(child, costWeight * cost + weight * heuristic(state, problem))
+                else:
+                    frontier.push(child)
+                costs[child] = cost
+
+                a = actionIds.get(action)
+                if a is None:
+                    a = actionIds[action] = len(actionTable)
+                    actionTable.append(action)
+                parent[child] = current
+                parentAction[child] = a
+
+            if len(frontier) > stats.maxFrontier: stats.maxFrontier = len(frontier)
+            if reportExpansions:
+                if strategy != BEST_FIRST: f = currentCost
+                yield SearchEvent(currentState, currentCost, f, len(frontier), stats.expanded)
+
+        stats.elapsed = time.time() - stats.startTime
+        yield SearchEvent(None, None, None, 0, stats.expanded, True)
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+###########################
+# Bidirectional search    #
+###########################
+
+# The bidirectional searches need a problem with a single goal state and a
+# way to step backwards from it, i.e. two methods on top of SearchProblem's:
+#
+#   getGoalState(): returns the goal state
+#   getPredecessors(state): returns (predecessor, action, stepCost) triples,
+#     where taking 'action' in 'predecessor' leads to state for stepCost
+#
+# PositionSearchProblem in searchAgents.py provides both.
+
+class ReverseSearchProblem(SearchProblem):
+    """
+    The search problem of getting from a problem's goal back to its start,
+    stepping along predecessors.  Actions keep their forward meaning.
+
+    Heuristics written for PositionSearchProblem look at problem.goal, which
+    here is the original start, so they estimate the distance back to the
+    start as the backward half of a bidirectional search needs.  Any other
+    attribute is looked up on the original problem.
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.getStartState()
+
+    def getStartState(self):
+        return self.problem.getGoalState()
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def getSuccessors(self, state):
+        return self.problem.getPredecessors(state)
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+def _checkBidirectional(problem):
+    for method in ('getGoalState', 'getPredecessors'):
+        if not hasattr(problem, method):
+            raise Exception('Bidirectional search needs a problem with a ' + method + ' method')
+
+def _joinPaths(problem, links, meeting):
+    """
+    Returns the actions from the start to the goal through meeting, where
+    links[0] maps each state reached forwards to (the state before it, action)
+    and links[1] maps each state reached backwards to (the state after it,
+    action).
+    """
+    actions = []
+    state = meeting
+    while links[0][state] != None:
+        state, action = links[0][state][:2]
+        actions.append(action)
+    actions.reverse()
+    state = meeting
+    while links[1][state] != None:
+        state, action = links[1][state][:2]
+        actions.append(action)
+    # Tell the problem the goal has been reached (PositionSearchProblem draws
+    # the expanded cells at this point)
+    problem.isGoalState(state)
+    return actions
+
+def bidirectionalBreadthFirstSearch(problem):
+    """
+    Breadth first search from the start and the goal at once, a whole layer
+    at a time from whichever side has the smaller frontier, until the two
+    meet.  Finds a path with the fewest actions, expanding about the square
+    root of what breadth first search does in open mazes.
+    """
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+    _checkBidirectional(problem)
+
+    start, goal = problem.getStartState(), problem.getGoalState()
+    if problem.isGoalState(start): return []
+    expand = (problem.getSuccessors, problem.getPredecessors)
+    links = ({start: None}, {goal: None}) # state -> (neighbour toward the root, action, depth)
+    layers = ([start], [goal])
+    depths = [0, 0]
+
+    try:
+        while layers[0] and layers[1]:
+            side = 0 if len(layers[0]) <= len(layers[1]) else 1
+            seen, other = links[side], links[1 - side]
+            depth = depths[side] + 1
+            nextLayer, meeting, length = [], None, INFINITY
+            for state in layers[side]:
+                stats.expanded += 1
+                for next, action, stepCost in expand[side](state):
+                    if next in seen: continue
+                    seen[next] = (state, action, depth)
+                    nextLayer.append(next)
+                    stats.generated += 1
+                    if next in other:
+                        otherDepth = other[next][2] if other[next] != None else 0
+                        if depth + otherDepth < length:
+                            meeting, length = next, depth + otherDepth
+            if meeting != None:
+                return _joinPaths(problem, links, meeting)
+            layers = (nextLayer, layers[1]) if side == 0 else (layers[0], nextLayer)
+            depths[side] = depth
+            if len(layers[0]) + len(layers[1]) > stats.maxFrontier:
+                stats.maxFrontier = len(layers[0]) + len(layers[1])
+        return None
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+def bidirectionalAStarSearch(problem, heuristic=nullHeuristic):
+    """
+    Bidirectional A* in the style of MM (Holte et al., 2016): a forward A*
+    from the start and a backward A* from the goal, on a ReverseSearchProblem,
+    with nodes prioritised by max(g + h, 2g).  Each step expands the lowest
+    priority node of either side, and the search stops once the best path
+    through a state both sides have reached costs no more than that
+    priority.  Neither side expands a node past half the optimal cost, and
+    the solution is optimal when the heuristic is admissible both ways.
+    """
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+    _checkBidirectional(problem)
+
+    start, goal = problem.getStartState(), problem.getGoalState()
+    if problem.isGoalState(start): return []
+    problems = (problem, ReverseSearchProblem(problem))
+    roots = (start, goal)
+    costs = ({start: 0}, {goal: 0})       # state -> best known g
+    links = ({start: None}, {goal: None}) # state -> (neighbour toward the root, action)
+    frontiers = (util.PriorityQueue(), util.PriorityQueue())
+    for side in (0, 1):
+        frontiers[side].push(roots[side], heuristic(roots[side], problems[side]))
+    bestCost, meeting = INFINITY, None
+
+    try:
+        while not frontiers[0].isEmpty() and not frontiers[1].isEmpty():
+            priorities = (frontiers[0].peekPriority(), frontiers[1].peekPriority())
+            if bestCost <= min(priorities): break
+            side = 0 if priorities[0] <= priorities[1] else 1
+            g, other = costs[side], costs[1 - side]
+
+            state = frontiers[side].pop()
+            stats.expanded += 1
+            for next, action, stepCost in problems[side].getSuccessors(state):
+                cost = g[state] + stepCost
+                if next in g and g[next] <= cost: continue
+                if next not in g: stats.generated += 1
+                g[next] = cost
+                links[side][next] = (state, action)
+                # Priorities never drop below g, so a state reached more cheaply
+                # is simply requeued
+                frontiers[side].update(next, max(cost + heuristic(next, problems[side]), 2 * cost))
+                if next in other and cost + other[next] < bestCost:
+                    bestCost, meeting = cost + other[next], next
+
+            if len(frontiers[0]) + len(frontiers[1]) > stats.maxFrontier:
+                stats.maxFrontier = len(frontiers[0]) + len(frontiers[1])
+
+        if meeting == None: return None
+        return _joinPaths(problem, links, meeting)
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+##########################
+# Anytime search         #
+##########################
+
+def anytimeRepairingAStarSearch(problem, heuristic=nullHeuristic, budget=None, weight=3.0, weightStep=0.5):
+    """
+    Anytime repairing A* (ARA*, Likhachev, Gordon and Thrun, 2003).
+
+    Runs weighted A*, with priorities g + weight * h, to find a first plan
+    quickly: with an admissible heuristic it costs at most weight times the
+    optimum.  Then it lowers the weight by weightStep and repairs the plan,
+    down to weight 1 (an optimal plan), or until budget seconds have passed,
+    and returns the best plan found so far.  The search is never restarted:
+    each round keeps the costs and parents found so far, and only
+    re-expands states whose cost has dropped since they were expanded.
+
+    The budget is a soft deadline: if there is no plan yet when it runs out,
+    the search carries on until it has one.
+
+    Use it from SearchAgent with e.g. -a fn=arastar,heuristic=manhattanHeuristic,budget=0.5
+    """
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+    stats.weight = INFINITY # the returned plan costs at most this times the optimum
+    if budget != None: deadline = stats.startTime + float(budget)
+    weight, weightStep = float(weight), float(weightStep)
+
     start = problem.getStartState()
-    pq = util.PriorityQueue()
-    pq.push(start, heuristic(start, problem))
-    back = {}
-    back[start] = (None, None, 0) # back now includes cost
-    expanded = []
-
-    while not pq.isEmpty():
-        current = pq.pop()
-        currentCost = back[current][2]
-
-        if problem.isGoalState(current):
-            actions = []
-            while current != problem.getStartState():
-                actions.append(back[current][1])
-                current = back[current][0]
-            actions.reverse()
-            return actions
-
-        expanded.append(current)
-        for child in problem.getSuccessors(current):
-            state = child[0]
-            if state not in expanded:
-                childCost = currentCost + child[2]
-                if not (state in back and childCost > back[state][2]):
-                    pq.update(state, childCost + heuristic(state, problem))
-                    back[state] = (current, child[1], childCost)
+    costs = {start: 0}
+    parents = {start: None}  # state -> (parent state, action)
+    heuristics = {start: heuristic(start, problem)}
+    closed = set()
+    inconsistent = set()     # closed states whose cost dropped this round
+    bestCost, bestGoal = INFINITY, None
+
+    def plan(state):
+        actions = []
+        while parents[state] != None:
+            state, action = parents[state]
+            actions.append(action)
+        actions.reverse()
+        return actions
+
+    if problem.isGoalState(start): return []
+    frontier = util.PriorityQueue()
+    frontier.push(start, weight * heuristics[start])
+    openStates = set([start])
+
+    try:
+        while True:
+            # Improve the plan: weighted A* until no open state could lead
+            # to a plan better than the incumbent (within the weight)
+            while not frontier.isEmpty() and frontier.peekPriority() < bestCost:
+                if bestGoal != None and budget != None and time.time() > deadline:
+                    return plan(bestGoal)
+                state = frontier.pop()
+                openStates.discard(state)
+                closed.add(state)
+                stats.expanded += 1
+                g = costs[state]
+                for next, action, stepCost in problem.getSuccessors(state):
+                    cost = g + stepCost
+                    if next in costs and costs[next] <= cost: continue
+                    if next not in costs:
+                        heuristics[next] = heuristic(next, problem)
+                        stats.generated += 1
+                    costs[next] = cost
+                    parents[next] = (state, action)
+                    if problem.isGoalState(next):
+                        # Goals are never expanded; they only set the incumbent
+                        if cost < bestCost: bestCost, bestGoal = cost, next
+                    elif next in closed:
+                        inconsistent.add(next)
+                    else:
+                        frontier.update(next, cost + weight * heuristics[next])
+                        openStates.add(next)
+                if len(frontier) > stats.maxFrontier: stats.maxFrontier = len(frontier)
+
+            if bestGoal == None: return None
+            stats.weight = weight
+            if weight <= 1 or (budget != None and time.time() > deadline):
+                return plan(bestGoal)
+
+            # Next round: a lower weight, with the open and inconsistent
+            # states requeued under it
+            weight = max(1.0, weight - weightStep)
+            openStates |= inconsistent
+            inconsistent = set()
+            closed = set()
+            frontier = util.PriorityQueue()
+            for state in openStates:
+                frontier.push(state, costs[state] + weight * heuristics[state])
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+##########################
+# Jump point search      #
+##########################
+
+_VECTORS = {(0, 1): Directions.NORTH, (0, -1): Directions.SOUTH,
+            (1, 0): Directions.EAST, (-1, 0): Directions.WEST}
+
+def jumpPointSearch(problem, heuristic=nullHeuristic):
+    """
+    Jump point search (Harabor and Grastien, 2011) for 4-connected grids
+    where every step costs 1, such as PositionSearchProblem and
+    AnyFoodSearchProblem.  It is A* run directly on problem.walls (a
+    game.Grid), except that runs of cells with only one sensible way
+    onwards are skipped in a single jump:
+
+      - moving east or west, keep going until a goal, or a cell where a
+        wall just behind it to the north or south has opened up ("forced"
+        turns north or south);
+      - moving north or south, keep going until a goal, or a cell from
+        which a jump east or west would stop somewhere.
+
+    Only the cells jumps stop at are expanded.  The path found is optimal,
+    so it is as long as aStarSearch's, though it may not be the same one.
+    Problems with a costFn other than searchAgents.unitCost (e.g. those of
+    StayEastSearchAgent) are refused, as their steps cost more or less than 1.
+    """
+    costFn = getattr(problem, 'costFn', None)
+    if costFn != None:
+        import searchAgents
+        if costFn is not searchAgents.unitCost:
+            raise Exception('Jump point search needs a problem whose steps all cost 1 (costFn searchAgents.unitCost)')
+
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+
+    walls = problem.walls
+    isGoal = problem.isGoalState
+    bookkeeping = '_expanded' in dir(problem)
+    horizontalJumps = {} # (x, y, dx) -> where an east / west jump from (x, y) stops
+
+    def jumpHorizontally(x, y, dx):
+        key = (x, y, dx)
+        if key not in horizontalJumps:
+            point = None
+            while True:
+                x += dx
+                if walls[x][y]: break
+                if isGoal((x, y)) or \
+                   (walls[x - dx][y + 1] and not walls[x][y + 1]) or \
+                   (walls[x - dx][y - 1] and not walls[x][y - 1]):
+                    point = (x, y)
+                    break
+            horizontalJumps[key] = point
+        return horizontalJumps[key]
+
+    def jumpVertically(x, y, dy):
+        while True:
+            y += dy
+            if walls[x][y]: return None
+            if isGoal((x, y)) or jumpHorizontally(x, y, 1) or jumpHorizontally(x, y, -1):
+                return (x, y)
+
+    start = problem.getStartState()
+    if isGoal(start): return []
+    costs = {start: 0}
+    parents = {start: None}  # jump point -> the jump point before it
+    arrivals = {start: None} # jump point -> (dx, dy) of the jump that reached it
+    frontier = util.PriorityQueue()
+    frontier.push(start, heuristic(start, problem))
+
+    try:
+        while not frontier.isEmpty():
+            current = frontier.pop()
+            x, y = current
+            if current != start and isGoal(current):
+                actions = []
+                while parents[current] != None:
+                    (px, py), (dx, dy) = parents[current], arrivals[current]
+                    actions.extend([_VECTORS[(dx, dy)]] * (abs(x - px) + abs(y - py)))
+                    current = x, y = px, py
+                actions.reverse()
+                return actions
+
+            stats.expanded += 1
+            if bookkeeping: problem._expanded += 1
+
+            arrival = arrivals[current]
+            if arrival == None:
+                directions = _VECTORS.keys()
+            elif arrival[0] == 0:
+                directions = [arrival, (1, 0), (-1, 0)]
+            else:
+                dx = arrival[0]
+                directions = [arrival]
+                for dy in (1, -1):
+                    if walls[x - dx][y + dy] and not walls[x][y + dy]:
+                        directions.append((0, dy))
+
+            for dx, dy in directions:
+                if dy == 0:
+                    point = jumpHorizontally(x, y, dx)
+                else:
+                    point = jumpVertically(x, y, dy)
+                if point == None: continue
+                stats.generated += 1
+                cost = costs[current] + abs(point[0] - x) + abs(point[1] - y)
+                if point in costs and costs[point] <= cost: continue
+                costs[point] = cost
+                parents[point] = current
+                arrivals[point] = (dx, dy)
+                frontier.update(point, cost + heuristic(point, problem))
+
+            if len(frontier) > stats.maxFrontier: stats.maxFrontier = len(frontier)
+        return None
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+##########################
+# Memory-bounded search  #
+##########################
+
+# Default cap on the number of search nodes (or transposition table entries)
+# the memory-bounded searches below keep at once
+MAX_MEMORY_NODES = 200000
+
+def iterativeDeepeningAStarSearch(problem, heuristic=nullHeuristic, maxNodes=MAX_MEMORY_NODES):
+    """
+    Iterative deepening A*: a series of depth first searches, each cut off
+    at an f = g + h bound, where the next bound is the smallest f that
+    exceeded the last one.  Memory is the current path plus a transposition
+    table of at most maxNodes states, which prunes states already reached
+    more cheaply during the same iteration.  Optimal for consistent
+    heuristics.
+    """
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+    maxNodes = int(maxNodes)
+
+    start = problem.getStartState()
+    bound = heuristic(start, problem)
+    try:
+        while bound < INFINITY:
+            table = util.LRUCache(maxNodes) # state -> cheapest g seen this iteration
+            nextBound = INFINITY
+            # Each frame is [state, g, ordered children, index of next child]
+            stack = [[start, 0, None, 0]]
+            actions, onPath = [], set([start])
+            while stack:
+                frame = stack[-1]
+                state, g, children = frame[0], frame[1], frame[2]
+                if children is None:
+                    if problem.isGoalState(state):
+                        return actions
+                    stats.expanded += 1
+                    children = []
+                    for child, action, stepCost in problem.getSuccessors(state):
+                        childG = g + stepCost
+                        children.append((childG + heuristic(child, problem), child, action, childG))
+                    children.sort(key=lambda c: c[0])
+                    frame[2] = children
+                    stats.generated += len(children)
+
+                if frame[3] == len(children):
+                    stack.pop()
+                    onPath.discard(state)
+                    if actions: actions.pop()
+                    continue
+
+                f, child, action, childG = children[frame[3]]
+                frame[3] += 1
+                if f > bound:
+                    if f < nextBound: nextBound = f
+                    continue
+                if child in onPath: continue
+                seen = table.get(child)
+                if seen != None and seen <= childG: continue
+                table[child] = childG
+
+                stack.append([child, childG, None, 0])
+                onPath.add(child)
+                actions.append(action)
+                if len(stack) + len(table) > stats.maxFrontier:
+                    stats.maxFrontier = len(stack) + len(table)
+            bound = nextBound
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+class _SMANode:
+    "A node of the SMA* search tree."
+    __slots__ = ('state', 'parent', 'index', 'action', 'g', 'f', 'depth', 'successors',
+                 'children', 'inMemory', 'dead', 'complete', 'forgotten', 'inQueue', 'version')
+
+    def __init__(self, state, parent, index, action, g, f):
+        self.state, self.parent, self.index, self.action = state, parent, index, action
+        self.g, self.f = g, f
+        self.depth = parent.depth + 1 if parent != None else 0
+        self.successors = None     # (state, action, cost) triples, once generated
+        self.children = set()      # child nodes currently in memory
+        self.inMemory = set()      # their indices into successors
+        self.dead = set()          # indices of successors that can never lead anywhere
+        self.complete = False      # every successor has been generated at least once
+        self.forgotten = {}        # index -> f of each child dropped from memory
+        self.inQueue = False
+        self.version = 0           # bumped whenever the node is re-queued; stale heap entries are skipped
+
+# Heap entries SMA* allows per tree node before dropping stale ones
+HEAP_SLACK = 4
+
+def simplifiedMemoryBoundedAStarSearch(problem, heuristic=nullHeuristic, maxNodes=MAX_MEMORY_NODES):
+    """
+    Simplified memory-bounded A* (SMA*).  Behaves like A* until the tree
+    holds maxNodes nodes; then the shallowest, highest-f leaf is dropped
+    and its f is remembered by its parent, which regenerates that branch if
+    it looks best again.  Finds the optimal solution whenever the optimal
+    path fits in memory, and otherwise returns None -- although with much
+    too little memory, finding that out can take exponentially long.
+
+    The open list is a pair of heaps holding at most HEAP_SLACK * maxNodes
+    entries, so memory stays proportional to maxNodes however long the
+    search runs (lastSearchStats.maxHeapEntries records the peak).
+    """
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+    maxNodes = int(maxNodes)
+
+    counter = itertools.count()
+    best, worst = [], [] # heaps of (key..., counter, version, node)
+    stats.maxHeapEntries = 0
+
+    def isLive(entry):
+        node = entry[-1]
+        return node.inQueue and node.version == entry[-2]
+
+    def enqueue(node):
+        node.inQueue = True
+        node.version += 1
+        heapq.heappush(best, (node.f, -node.depth, next(counter), node.version, node))
+        if not node.children:
+            heapq.heappush(worst, (-node.f, node.depth, next(counter), node.version, node))
+        # Re-queueing leaves stale entries behind, which would keep dropped
+        # nodes alive; once they pile up, rebuild the heaps from live entries
+        entries = len(best) + len(worst)
+        if entries > HEAP_SLACK * maxNodes:
+            best[:] = [entry for entry in best if isLive(entry)]
+            worst[:] = [entry for entry in worst if isLive(entry) and not entry[-1].children]
+            heapq.heapify(best)
+            heapq.heapify(worst)
+            entries = len(best) + len(worst)
+        if entries > stats.maxHeapEntries: stats.maxHeapEntries = entries
+
+    def backup(node):
+        # A complete node's f is the lowest f below it; pass changes upwards
+        while node != None and node.complete:
+            lowest = min(node.forgotten.values() or [INFINITY])
+            for child in node.children:
+                if child.f < lowest: lowest = child.f
+            if lowest <= node.f: break
+            node.f = lowest
+            if node.inQueue: enqueue(node)
+            node = node.parent
+
+    def dropWorstLeaf(keep):
+        "Forgets the shallowest, highest-f leaf in the queue other than keep."
+        skipped = []
+        dropped = False
+        while worst:
+            entry = heapq.heappop(worst)
+            node = entry[-1]
+            if not isLive(entry) or node.children: continue
+            if node is keep or node.parent == None:
+                skipped.append(entry)
+                continue
+            parent = node.parent
+            node.inQueue = False
+            parent.children.discard(node)
+            parent.inMemory.discard(node.index)
+            parent.forgotten[node.index] = node.f
+            if not parent.inQueue or not parent.children: enqueue(parent)
+            backup(parent)
+            dropped = True
+            break
+        for entry in skipped: heapq.heappush(worst, entry)
+        return dropped
+
+    start = problem.getStartState()
+    root = _SMANode(start, None, None, None, 0, heuristic(start, problem))
+    used = 1
+    enqueue(root)
+
+    try:
+        while best:
+            entry = heapq.heappop(best)
+            node = entry[-1]
+            if not isLive(entry): continue
+            if node.f == INFINITY: return None
+
+            if problem.isGoalState(node.state):
+                actions = []
+                while node.parent != None:
+                    actions.append(node.action)
+                    node = node.parent
+                actions.reverse()
+                return actions
+
+            if node.successors == None:
+                node.successors = problem.getSuccessors(node.state)
+                stats.expanded += 1
+            pending = [i for i in range(len(node.successors)) if i not in node.inMemory and i not in node.dead]
+            if pending:
+                # New successors first; after that, the most promising forgotten one
+                fresh = [i for i in pending if i not in node.forgotten]
+                if fresh:
+                    index = fresh[0]
+                else:
+                    index = min(pending, key=node.forgotten.get)
+                state, action, stepCost = node.successors[index]
+                stats.generated += 1
+
+                # Pathmax; cycles and nodes too deep to complete in memory are dead ends
+                g = node.g + stepCost
+                f = max(node.f, g + heuristic(state, problem), node.forgotten.pop(index, 0))
+                ancestor = node
+                while ancestor != None and f < INFINITY:
+                    if ancestor.state == state: f = INFINITY
+                    ancestor = ancestor.parent
+                if node.depth + 2 >= maxNodes and not problem.isGoalState(state):
+                    f = INFINITY
+
+                if f < INFINITY and used >= maxNodes and dropWorstLeaf(node):
+                    used -= 1
+                if f == INFINITY or used >= maxNodes:
+                    node.dead.add(index)
+                else:
+                    child = _SMANode(state, node, index, action, g, f)
+                    node.children.add(child)
+                    node.inMemory.add(index)
+                    used += 1
+                    if used > stats.maxFrontier: stats.maxFrontier = used
+                    enqueue(child)
+
+                if len(fresh) <= 1:
+                    node.complete = True
+                    backup(node)
+
+            if len(node.inMemory) + len(node.dead) < len(node.successors):
+                enqueue(node)
+            else:
+                node.inQueue = False
+                # Forget dead ends (every successor dead), along with any
+                # ancestors that become dead ends as a result
+                while not node.children and len(node.dead) == len(node.successors):
+                    parent = node.parent
+                    if parent == None: return None
+                    parent.children.discard(node)
+                    parent.inMemory.discard(node.index)
+                    parent.dead.add(node.index)
+                    node.inQueue = False
+                    used -= 1
+                    node = parent
+                    if node.inQueue and not node.children: enqueue(node)
+                backup(node)
+        return None
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+##########################
+# Disk-backed search     #
+##########################
+
+def externalBreadthFirstSearch(problem, directory=None, memoryRecords=externalSearch.MEMORY_RECORDS):
+    """
+    Breadth first search that keeps its frontier and closed set in files
+    instead of memory, for state spaces that do not fit in RAM (see
+    externalSearch.py).  The problem must be able to pack its states into
+    ints.  At most memoryRecords states are held in memory at once; the
+    files go under directory (by default the system's temporary directory).
+    """
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+    try:
+        return externalSearch.layeredSearch(problem, stats, False, directory, memoryRecords)
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+def externalUniformCostSearch(problem, directory=None, memoryRecords=externalSearch.MEMORY_RECORDS):
+    """
+    Uniform cost search with the frontier and closed set in files, like
+    externalBreadthFirstSearch.  Step costs must be positive integers.
+    """
+    global lastSearchStats
+    stats = SearchStats()
+    lastSearchStats = stats
+    try:
+        return externalSearch.layeredSearch(problem, stats, True, directory, memoryRecords)
+    finally:
+        stats.elapsed = time.time() - stats.startTime
+
+##########################
+# Portfolio search       #
+##########################
+
+# The searches portfolioSearch races against each other: (name of the search
+# function, extra arguments, the most its path can cost compared to the
+# optimum when the heuristic is admissible)
+PORTFOLIO = [
+    ('aStarSearch', {}, 1.0),
+    ('weightedAStarSearch', {'weight': 2.0}, 2.0),
+    ('iterativeDeepeningAStarSearch', {}, 1.0),
+    ('greedyBestFirstSearch', {}, INFINITY),
+]
+
+def _runPortfolioMember(task):
+    "Runs one member of a portfolio in a worker process."
+    name, args, problem, heuristic = task
+    try:
+        actions = globals()[name](problem, heuristic=heuristic, **args)
+    except Exception, e:
+        return name, None, None, '%s %s' % (e.__class__.__name__, e)
+    return name, actions, getattr(problem, '_expanded', 0), lastSearchStats
+
+def portfolioSearch(problem, heuristic=nullHeuristic, bound=None, timeout=None, workers=None):
+    """
+    Runs the searches in PORTFOLIO in parallel, each in its own process on
+    its own copy of the problem, and returns the path of the first to finish.
+    The others are then stopped.  Which search is fastest depends a lot on
+    the layout, so this is about as fast as the best of them there.
+
+    bound is the optimality required: only searches whose paths cost at most
+    bound times the optimum take part (bound=1 for optimal paths only).  By
+    default any path will do.  After timeout seconds, None is returned.
+
+    The problem and heuristic are pickled to send them to the workers, so
+    they cannot hold lambdas or other unpicklable values.  Use it from
+    SearchAgent with e.g. -a fn=portfolio,prob=FoodSearchProblem,heuristic=foodHeuristic,bound=2
+    """
+    global lastSearchStats
+    if bound != None: bound = float(bound)
+    if timeout != None: deadline = time.time() + float(timeout)
+    members = [(name, args, problem, heuristic) for name, args, worst in PORTFOLIO
+               if bound == None or worst <= bound]
+    if not members: raise Exception('No search in the portfolio meets the bound %s' % bound)
+    try:
+        # A pickling error inside the pool would leave it waiting forever
+        cPickle.dumps((problem, heuristic), cPickle.HIGHEST_PROTOCOL)
+    except Exception, e:
+        raise Exception('portfolioSearch needs a picklable problem and heuristic: %s' % e)
+
+    pool = multiprocessing.Pool(int(workers or len(members)))
+    try:
+        results = pool.imap_unordered(_runPortfolioMember, members)
+        failures = []
+        for i in range(len(members)):
+            try:
+                if timeout == None: result = results.next()
+                else: result = results.next(max(deadline - time.time(), 0))
+            except multiprocessing.TimeoutError:
+                return None
+            name, actions, expanded, stats = result
+            if actions != None:
+                if '_expanded' in dir(problem): problem._expanded = expanded
+                if stats != None: stats.winner = name
+                lastSearchStats = stats
+                return actions
+            if expanded == None: failures.append('%s: %s' % (name, stats))
+        if len(failures) == len(members):
+            raise Exception('Every search in the portfolio failed\n' + '\n'.join(failures))
+        return None
+    finally:
+        pool.terminate()
+        pool.join()
 
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bibfs = bidirectionalBreadthFirstSearch
+biastar = bidirectionalAStarSearch
+jps = jumpPointSearch
+arastar = anytimeRepairingAStarSearch
+idastar = iterativeDeepeningAStarSearch
+smastar = simplifiedMemoryBoundedAStarSearch
+portfolio = portfolioSearch
+ebfs = externalBreadthFirstSearch
+eucs = externalUniformCostSearch
@@ -37,9 +37,16 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
+from game import BitGrid
 import util
 import time
+import itertools
 import search
+import distanceOracle
+import foodDistanceField
+import mazeGraph
+import foodHeuristics
+from array import array
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -68,21 +75,36 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
+      bidirectionalBreadthFirstSearch or bibfs (PositionSearchProblem only)
+      bidirectionalAStarSearch or biastar (PositionSearchProblem only)
+      jumpPointSearch or jps (PositionSearchProblem with unit costs and AnyFoodSearchProblem only)
+      iterativeDeepeningAStarSearch or idastar
+      simplifiedMemoryBoundedAStarSearch or smastar
+      anytimeRepairingAStarSearch or arastar (takes a time budget in seconds)
+      portfolioSearch or portfolio (races several searches in parallel processes)
+      externalBreadthFirstSearch or ebfs (keeps the search on disk; FoodSearchProblem only)
+      externalUniformCostSearch or eucs (the same, by path cost)
 
+    Any other agent arguments are passed on to the search function, e.g.
+
+    > python pacman.py -p SearchAgent -a fn=idastar,heuristic=foodHeuristic,prob=FoodSearchProblem,maxNodes=50000
 
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', **searchArgs):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
         if fn not in dir(search):
             raise AttributeError, fn + ' is not a search function in search.py.'
         func = getattr(search, fn)
+        for arg in searchArgs:
+            if arg not in func.func_code.co_varnames[:func.func_code.co_argcount]:
+                raise AttributeError, arg + ' is not an argument of ' + fn + ' in search.py.'
         if 'heuristic' not in func.func_code.co_varnames:
             print('[SearchAgent] using function ' + fn)
-            self.searchFunction = func
+            self.searchFunction = lambda x: func(x, **searchArgs)
         else:
             if heuristic in globals().keys():
                 heur = globals()[heuristic]
@@ -92,7 +114,7 @@ class SearchAgent(Agent):
                 raise AttributeError, heuristic + ' is not a function in searchAgents.py or search.py.'
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
-            self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchFunction = lambda x: func(x, heuristic=heur, **searchArgs)
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -112,10 +134,13 @@ class SearchAgent(Agent):
         if self.searchFunction == None: raise Exception, "No search function provided for SearchAgent"
         starttime = time.time()
         problem = self.searchType(state) # Makes a new search problem
+        search.lastSearchStats = None
         self.actions  = self.searchFunction(problem) # Find a path
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if search.lastSearchStats != None: print('Peak frontier size: %d' % search.lastSearchStats.maxFrontier)
+        if getattr(search.lastSearchStats, 'winner', None): print('Portfolio winner: %s' % search.lastSearchStats.winner)
 
     def getAction(self, state):
         """
@@ -133,6 +158,10 @@ class SearchAgent(Agent):
         else:
             return Directions.STOP
 
+def unitCost(position):
+    "Every step costs 1 (the default costFn of PositionSearchProblem)."
+    return 1
+
 class PositionSearchProblem(search.SearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
@@ -144,7 +173,7 @@ class PositionSearchProblem(search.SearchProblem):
     Note: this search problem is fully specified; you should NOT change it.
     """
 
-    def __init__(self, gameState, costFn = lambda x: 1, goal=(1,1), start=None, warn=True, visualize=True):
+    def __init__(self, gameState, costFn = unitCost, goal=(1,1), start=None, warn=True, visualize=True):
         """
         Stores the start and goal.
 
@@ -153,6 +182,7 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -192,15 +222,8 @@ class PositionSearchProblem(search.SearchProblem):
          cost of expanding to that successor
         """
 
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        costFn = self.costFn
+        successors = [(nextState, action, costFn(nextState)) for nextState, action in self.graph.moves[state]]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -210,6 +233,27 @@ class PositionSearchProblem(search.SearchProblem):
 
         return successors
 
+    def getGoalState(self):
+        return self.goal
+
+    def getPredecessors(self, state):
+        """
+        Returns (predecessor, action, stepCost) triples, one for each position
+        from which 'action' leads to state at a cost of stepCost.  Together
+        with getGoalState, this lets the bidirectional searches in search.py
+        search backwards from the goal.
+        """
+        cost = self.costFn(state)
+        predecessors = [(previous, action, cost) for previous, action in self.graph.reverseMoves[state]]
+
+        # Bookkeeping for display purposes
+        self._expanded += 1
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return predecessors
+
     def getCostOfActions(self, actions):
         """
         Returns the cost of a particular sequence of actions. If those actions
@@ -278,6 +322,7 @@ class CornersProblem(search.SearchProblem):
         Stores the walls, pacman's starting position and corners.
         """
         self.walls = startingGameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
         self.startingPosition = startingGameState.getPacmanPosition()
         top, right = self.walls.height-2, self.walls.width-2
         self.corners = ((1,1), (1,top), (right, 1), (right, top))
@@ -287,6 +332,7 @@ class CornersProblem(search.SearchProblem):
         self._expanded = 0 # DO NOT CHANGE; Number of search nodes expanded
         # Please add any code here which you would like to use
         # in initializing the problem
+        self.heuristicInfo = {} # A dictionary for the heuristic to store information
 
     def getStartState(self):
         """
@@ -311,22 +357,15 @@ class CornersProblem(search.SearchProblem):
             state, 'action' is the action required to get there, and 'stepCost'
             is the incremental cost of expanding to that successor
         """
+        x, y, c = state
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            x, y, c = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            hitsWall = self.walls[nextx][nexty]
-            if not hitsWall:
-                # update corners that have not been visited
-                nextc = []
-                for corner in c:
-                    if corner != (nextx, nexty):
-                        nextc.append(corner)
-                nextc = tuple(nextc)
-                successors.append(((nextx, nexty, nextc), action, 1))
+        for (nextx, nexty), action in self.graph.moves[(x, y)]:
+            # update corners that have not been visited
+            if (nextx, nexty) in c:
+                nextc = tuple([corner for corner in c if corner != (nextx, nexty)])
+            else:
+                nextc = c
+            successors.append(((nextx, nexty, nextc), action, 1))
 
         self._expanded += 1 # DO NOT CHANGE
         return successors
@@ -359,29 +398,22 @@ def cornersHeuristic(state, problem):
     admissible (as well as consistent).
     """
 
-    walls = problem.walls
-
+    distances = getMazeDistances(problem)
     curPos = (state[0], state[1])
-    cornersLeft = list(state[2])
-
-    heur = 0
-
-    # while corners have not been visited
-    while cornersLeft:
-        minDist = walls.height + walls.width + 1
-        newPos = None
-        # find the closest corner
-        for c in cornersLeft:
-            manDist = abs(c[0] - curPos[0]) + abs(c[1] - curPos[1])
-            if manDist <= minDist:
-                minDist = manDist
-                newPos = c
-        heur += minDist
-        # update position to the closest corner position
-        curPos = newPos
-        cornersLeft.remove(newPos)
-
-    return heur
+    cornersLeft = state[2]
+
+    # Shortest tour through the remaining corners using true maze distances;
+    # with at most four corners every ordering can simply be tried.
+    heur = None
+    for order in itertools.permutations(cornersLeft):
+        cost, pos = 0, curPos
+        for corner in order:
+            cost += distances.getDistance(pos, corner)
+            pos = corner
+        if heur == None or cost < heur:
+            heur = cost
+
+    return heur or 0
 
 class AStarCornersAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
@@ -396,15 +428,24 @@ class FoodSearchProblem:
 
     A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      foodGrid:       a BitGrid (see game.py) of either True or False, specifying remaining food
+
+    A BitGrid reads just like a Grid, but is a single int underneath, so
+    successors share it until a pellet is eaten and hashing it is O(1).
     """
     def __init__(self, startingGameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        self.start = (startingGameState.getPacmanPosition(), BitGrid.fromGrid(startingGameState.getFood()))
         self.walls = startingGameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
         self.heuristicInfo = {} # A dictionary for the heuristic to store information
 
+        # For packing states into ints: bit i of the food part is pellet i
+        # of the starting food, and the low bits are Pacman's cell id
+        self.foodBits = [x * self.walls.height + y for x, y in self.start[1].asList()]
+        self.positionBits = max(self.graph.numCells - 1, 1).bit_length()
+
     def getStartState(self):
         return self.start
 
@@ -413,17 +454,31 @@ class FoodSearchProblem:
 
     def getSuccessors(self, state):
         "Returns successor states, the actions they require, and a cost of 1."
-        successors = []
         self._expanded += 1 # DO NOT CHANGE
-        for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state[0]
-            dx, dy = Actions.directionToVector(direction)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextFood = state[1].copy()
-                nextFood[nextx][nexty] = False
-                successors.append( ( ((nextx, nexty), nextFood), direction, 1) )
-        return successors
+        food = state[1]
+        return [((next, food.without(*next)), direction, 1) for next, direction in self.graph.moves[state[0]]]
+
+    def getPackedBits(self):
+        "The most bits packState needs (see externalSearch.py)."
+        return self.positionBits + len(self.foodBits)
+
+    def packState(self, state):
+        "Packs a state into a non-negative int."
+        position, food = state
+        bits, key = food.bits, 0
+        for i, bit in enumerate(self.foodBits):
+            if bits >> bit & 1: key |= 1 << i
+        return key << self.positionBits | self.graph.cellIds[position]
+
+    def unpackState(self, key):
+        "The inverse of packState."
+        position = self.graph.cells[key & ((1 << self.positionBits) - 1)]
+        key >>= self.positionBits
+        bits = 0
+        for bit in self.foodBits:
+            if key & 1: bits |= 1 << bit
+            key >>= 1
+        return (position, BitGrid(self.walls.width, self.walls.height, bits))
 
     def getCostOfActions(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
@@ -458,7 +513,7 @@ def foodHeuristic(state, problem):
     other hand, inadmissible or inconsistent heuristics may find optimal
     solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
+    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a BitGrid
     (see game.py) of either True or False. You can call foodGrid.asList() to get
     a list of food coordinates instead.
 
@@ -474,42 +529,28 @@ def foodHeuristic(state, problem):
     problem.heuristicInfo['wallCount']
     """
     position, foodGrid = state
-
-    foodLeft = []
-    for i in range(foodGrid.width):
-        for j in range(foodGrid.height):
-            if foodGrid[i][j]:
-                foodLeft.append((i, j))
-
-    if len(foodLeft) == 0:
-        return 0
-
-    heur = -1
-    curPos = position
-    for i in foodLeft:
-        for j in foodLeft:
-            # cost to collect two food pellets
-            dist = abs(i[0] - j[0]) + abs(i[1] - j[1])
-            dist += min(abs(i[0] - curPos[0]) + abs(i[1] - curPos[1]), \
-                abs(j[0] - curPos[0]) + abs(j[1] - curPos[1]))
-            heur = max(heur, dist)
-
-    return heur
+    if 'foodHeuristic' not in problem.heuristicInfo:
+        # Spanning tree / Held-Karp bounds over maze distances, memoized on
+        # the remaining food (see foodHeuristics.py)
+        distances = getMazeDistances(problem)
+        problem.heuristicInfo['foodHeuristic'] = foodHeuristics.FoodHeuristic(distances)
+    return problem.heuristicInfo['foodHeuristic'](position, foodGrid)
 
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
     def registerInitialState(self, state):
+        # Eat the closest dot, over and over; the distance field keeps track
+        # of how far every cell is from the remaining food as it is eaten
         self.actions = []
-        currentState = state
-        while(currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState) # The missing piece
+        position = state.getPacmanPosition()
+        field = foodDistanceField.FoodDistanceField(mazeGraph.getMazeGraph(state.getWalls()),
+                                                    state.getFood().asList())
+        while field.foodLeft() > 0:
+            nextPathSegment, position = field.pathToClosestFood(position)
+            if nextPathSegment == None:
+                raise Exception, 'Some food cannot be reached from %s' % str(state.getPacmanPosition())
             self.actions += nextPathSegment
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    t = (str(action), str(currentState))
-                    raise Exception, 'findPathToClosestDot returned an illegal move: %s!\n%s' % t
-                currentState = currentState.generateSuccessor(0, action)
+            field.removeFood(position)
         self.actionIndex = 0
         print 'Path found with cost %d.' % len(self.actions)
 
@@ -542,8 +583,9 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
+        self.graph = mazeGraph.getMazeGraph(self.walls)
         self.startState = gameState.getPacmanPosition()
-        self.costFn = lambda x: 1
+        self.costFn = unitCost
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
 
     def isGoalState(self, state):
@@ -554,13 +596,128 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         x,y = state
         return self.food[x][y]
 
-def mazeDistance(point1, point2, gameState):
+class RealTimeSearchAgent(Agent):
+    """
+    A real-time search agent (RTAA*, Koenig and Likhachev, 2006) for
+    PositionSearchProblem and AnyFoodSearchProblem.
+
+    Each move runs A* from Pacman's position for at most 'lookahead'
+    expansions, and then every expanded cell s learns the heuristic value
+    f - g(s), where f is the f-value of the best cell left on the frontier.
+    Pacman takes the first step towards that cell.  So each move costs a
+    bounded amount of work, and as the learned values grow the moves get
+    better.
+
+    Learned values live in a flat array with one entry per cell, kept in
+    learnedHeuristics between moves and between games on the same layout
+    (and, for AnyFoodSearchProblem, the same remaining food), so repeated
+    games converge on good paths.
+
+    > python pacman.py -p RealTimeSearchAgent -a prob=AnyFoodSearchProblem,lookahead=20 -l bigSearch -n 5
+    """
+    def __init__(self, prob='PositionSearchProblem', lookahead='30'):
+        if prob not in ('PositionSearchProblem', 'AnyFoodSearchProblem'):
+            raise AttributeError, prob + ' is not supported by RealTimeSearchAgent.'
+        self.searchType = globals()[prob]
+        self.lookahead = int(lookahead)
+        if self.lookahead < 1:
+            raise AttributeError, 'RealTimeSearchAgent needs a lookahead of at least 1.'
+
+    def makeProblem(self, state):
+        if self.searchType == PositionSearchProblem:
+            return PositionSearchProblem(state, warn=False, visualize=False)
+        return AnyFoodSearchProblem(state)
+
+    def getAction(self, state):
+        problem = self.makeProblem(state)
+        start = problem.getStartState()
+        if problem.isGoalState(start): return Directions.STOP
+        heuristic = LearnedHeuristic.forProblem(problem)
+
+        # Bounded A* from the current position
+        costs = {start: 0}
+        firstActions = {start: None}
+        frontier = util.PriorityQueue()
+        frontier.push(start, heuristic(start))
+        closed = []
+        while not frontier.isEmpty() and len(closed) < self.lookahead:
+            position = frontier.pop()
+            if problem.isGoalState(position):
+                frontier.push(position, costs[position])
+                break
+            closed.append(position)
+            for next, action, stepCost in problem.getSuccessors(position):
+                cost = costs[position] + stepCost
+                if next in costs and costs[next] <= cost: continue
+                costs[next] = cost
+                firstActions[next] = firstActions[position] or action
+                frontier.update(next, cost + heuristic(next))
+        if frontier.isEmpty(): return Directions.STOP # No food can be reached
+
+        # Learn from the lookahead, then head for the most promising frontier cell
+        best = frontier.pop()
+        bestF = costs[best] + heuristic(best)
+        for position in closed:
+            heuristic.learn(position, bestF - costs[position])
+        return firstActions[best]
+
+class LearnedHeuristic:
+    """
+    Heuristic values for every cell of a layout, for one goal, as learned by
+    RealTimeSearchAgent.  Values start at the Manhattan distance to the
+    goal (or to the nearest food) and only ever go up.  Cell (x, y) is
+    entry x * height + y of a flat array of doubles.
+    """
+    def __init__(self, walls, goals):
+        self.height = walls.height
+        self.goals = goals
+        self.values = array('d', [-1.0]) * (walls.width * walls.height) # -1: not learned yet
+
+    def __call__(self, position):
+        x, y = position
+        learned = self.values[x * self.height + y]
+        if learned >= 0: return learned
+        return min([abs(x - gx) + abs(y - gy) for gx, gy in self.goals] or [0])
+
+    def learn(self, position, value):
+        x, y = position
+        if value > self(position): self.values[x * self.height + y] = value
+
+    def forProblem(problem):
+        """
+        Returns the LearnedHeuristic for a problem's layout and goal(s),
+        creating it the first time they are seen.
+        """
+        if isinstance(problem, AnyFoodSearchProblem):
+            goal = BitGrid.fromGrid(problem.food)
+            goals = problem.food.asList()
+        else:
+            goal = problem.goal
+            goals = [problem.goal]
+        key = (problem.__class__.__name__, mazeGraph.getMazeGraph(problem.walls), goal)
+        heuristic = learnedHeuristics.get(key)
+        if heuristic == None:
+            heuristic = LearnedHeuristic(problem.walls, goals)
+            learnedHeuristics[key] = heuristic
+        return heuristic
+    forProblem = staticmethod(forProblem)
+
+# Learned heuristic tables, by problem type, walls and goal (see LearnedHeuristic)
+LEARNED_HEURISTIC_TABLES = 1000
+learnedHeuristics = util.LRUCache(LEARNED_HEURISTIC_TABLES)
+
+def mazeDistance(point1, point2, gameState, searchFunction=None):
     """
     Returns the maze distance between any two points, using the search functions
     you have already built. The gameState can be any game state -- Pacman's
     position in that state is ignored.
 
+    By default the distance comes from the layout's DistanceOracle.  Pass a
+    searchFunction (e.g. search.jps or search.bfs) to run a single search
+    instead, which is cheaper for a one-off query on a large layout.
+
     Example usage: mazeDistance( (2,4), (5,6), gameState)
+                   mazeDistance( (2,4), (5,6), gameState, search.jps)
 
     This might be a useful helper function for your ApproximateSearchAgent.
     """
@@ -569,5 +726,19 @@ def mazeDistance(point1, point2, gameState):
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    if searchFunction != None:
+        prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
+        return len(searchFunction(prob))
+    return distanceOracle.getDistanceOracle(walls).getDistance(point1, point2)
+
+def getMazeDistances(problem):
+    """
+    Returns the DistanceOracle (see distanceOracle.py) for the walls of a
+    search problem, stored in problem.heuristicInfo so that heuristics only
+    look it up once per problem.
+
+    Example usage: getMazeDistances(problem).getDistance( (2,4), (5,6) )
+    """
+    if 'mazeDistances' not in problem.heuristicInfo:
+        problem.heuristicInfo['mazeDistances'] = distanceOracle.getDistanceOracle(problem.walls)
+    return problem.heuristicInfo['mazeDistances']
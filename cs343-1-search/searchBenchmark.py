@@ -0,0 +1,241 @@
+# searchBenchmark.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Benchmark suite for search.py and searchAgents.py.
+
+Runs every search configuration (search function, problem type and
+heuristic) on every layout, without graphics, and records for each run the
+nodes expanded, path cost, wall time, peak resident memory and nodes
+expanded per second.  Each run happens in its own child process, so the
+memory figure is that run's alone and a run that goes past the time limit
+can be stopped.
+
+> python searchBenchmark.py -o results.json
+> python searchBenchmark.py -l mediumMaze,bigMaze -c astar:PositionSearchProblem:manhattanHeuristic
+> python searchBenchmark.py --csv results.csv --baseline results.json
+
+With --baseline, each run is compared against the same run in a saved JSON
+report, and any that got slower, expanded more nodes, found a costlier path
+or stopped finishing is flagged as a regression (the exit status is then 1).
+
+Configurations are written fn:problem[:heuristic], as in
+-a fn=...,prob=...,heuristic=... for SearchAgent.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import resource
+import optparse
+import multiprocessing
+
+import layout
+import pacman
+import search
+import searchAgents
+
+DEFAULT_CONFIGURATIONS = [
+    'dfs:PositionSearchProblem',
+    'bfs:PositionSearchProblem',
+    'ucs:PositionSearchProblem',
+    'astar:PositionSearchProblem:manhattanHeuristic',
+    'bibfs:PositionSearchProblem',
+    'biastar:PositionSearchProblem:manhattanHeuristic',
+    'jps:PositionSearchProblem:manhattanHeuristic',
+    'astar:CornersProblem:cornersHeuristic',
+    'astar:FoodSearchProblem:foodHeuristic',
+]
+
+# Peak RSS increases smaller than this are never regressions
+MIN_RSS_MB = 1.0
+
+FIELDS = ['layout', 'fn', 'problem', 'heuristic', 'status', 'expanded', 'cost',
+          'seconds', 'peakRssMB', 'nodesPerSecond']
+
+def parseConfiguration(configuration):
+    "Returns (fn, problem, heuristic) for 'fn:problem[:heuristic]'."
+    parts = configuration.split(':')
+    if len(parts) == 2: parts.append('nullHeuristic')
+    if len(parts) != 3:
+        raise Exception('Configurations look like fn:problem[:heuristic], not ' + configuration)
+    fn, prob, heuristic = parts
+    if fn not in dir(search):
+        raise AttributeError, fn + ' is not a search function in search.py.'
+    if prob not in dir(searchAgents) or not prob.endswith('Problem'):
+        raise AttributeError, prob + ' is not a search problem type in searchAgents.py.'
+    if heuristic not in dir(searchAgents) and heuristic not in dir(search):
+        raise AttributeError, heuristic + ' is not a function in searchAgents.py or search.py.'
+    return fn, prob, heuristic
+
+def makeProblem(prob, gameState):
+    if prob == 'PositionSearchProblem':
+        return searchAgents.PositionSearchProblem(gameState, warn=False, visualize=False)
+    return getattr(searchAgents, prob)(gameState)
+
+def measure(layoutName, fn, prob, heuristic):
+    """
+    Runs one configuration on one layout and returns its result row.  Meant
+    to be called in a fresh child process.
+    """
+    sys.stdout = open(os.devnull, 'w') # problems print warnings about odd layouts
+    row = {'layout': layoutName, 'fn': fn, 'problem': prob, 'heuristic': heuristic}
+    gameState = pacman.GameState()
+    gameState.initialize(layout.getLayout(layoutName), 0)
+    problem = makeProblem(prob, gameState)
+    func = getattr(search, fn)
+    heur = getattr(searchAgents, heuristic, None) or getattr(search, heuristic)
+
+    start = time.time()
+    if 'heuristic' in func.func_code.co_varnames:
+        actions = func(problem, heuristic=heur)
+    else:
+        actions = func(problem)
+    seconds = time.time() - start
+
+    expanded = getattr(problem, '_expanded', 0)
+    if expanded == 0 and search.lastSearchStats != None:
+        expanded = search.lastSearchStats.expanded
+    row['status'] = 'ok' if actions != None else 'no path'
+    row['expanded'] = expanded
+    row['cost'] = problem.getCostOfActions(actions) if actions != None else None
+    row['seconds'] = round(seconds, 4)
+    # ru_maxrss is in kilobytes on Linux (and bytes on Mac OS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin': peak /= 1024
+    row['peakRssMB'] = round(peak / 1024.0, 1)
+    row['nodesPerSecond'] = int(expanded / max(seconds, 1e-6))
+    return row
+
+def _child(connection, args):
+    try:
+        connection.send(measure(*args))
+    except Exception, e:
+        connection.send({'status': 'error: %s %s' % (e.__class__.__name__, e)})
+    connection.close()
+
+def runOne(layoutName, fn, prob, heuristic, timeout):
+    "Runs measure in a child process, giving up after timeout seconds."
+    receiver, sender = multiprocessing.Pipe(False)
+    child = multiprocessing.Process(target=_child, args=(sender, (layoutName, fn, prob, heuristic)))
+    child.start()
+    if receiver.poll(timeout):
+        row = receiver.recv()
+    else:
+        row = {'status': 'timeout'}
+    if child.is_alive(): child.terminate()
+    child.join()
+    if 'layout' not in row:
+        row.update({'layout': layoutName, 'fn': fn, 'problem': prob, 'heuristic': heuristic})
+    return row
+
+def key(row):
+    return (row['layout'], row['fn'], row['problem'], row['heuristic'])
+
+def findRegressions(rows, baseline, tolerance, minSeconds):
+    """
+    Compares rows against the baseline rows of the same runs.  Returns a
+    list of (row, reason) for every regression.
+    """
+    before = dict((key(row), row) for row in baseline)
+    regressions = []
+    for row in rows:
+        old = before.get(key(row))
+        if old == None or old['status'] != 'ok': continue
+        if row['status'] != 'ok':
+            regressions.append((row, 'was ok, now ' + row['status']))
+            continue
+        if row['cost'] > old['cost']:
+            regressions.append((row, 'path cost %s -> %s' % (old['cost'], row['cost'])))
+        if row['expanded'] > old['expanded'] * (1 + tolerance):
+            regressions.append((row, 'expanded %d -> %d' % (old['expanded'], row['expanded'])))
+        if row['seconds'] > max(old['seconds'] * (1 + tolerance), old['seconds'] + minSeconds):
+            regressions.append((row, 'time %.3fs -> %.3fs' % (old['seconds'], row['seconds'])))
+        if row['peakRssMB'] > max(old['peakRssMB'] * (1 + tolerance), old['peakRssMB'] + MIN_RSS_MB):
+            regressions.append((row, 'peak RSS %.1fMB -> %.1fMB' % (old['peakRssMB'], row['peakRssMB'])))
+    return regressions
+
+def formatRow(row):
+    if row['status'] != 'ok':
+        return '%-18s %-8s %-22s %-20s %s' % (row['layout'], row['fn'], row['problem'], row['heuristic'], row['status'])
+    return '%-18s %-8s %-22s %-20s %9d %7s %8.3f %8.1f %10d' % \
+        (row['layout'], row['fn'], row['problem'], row['heuristic'], row['expanded'],
+         row['cost'], row['seconds'], row['peakRssMB'], row['nodesPerSecond'])
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option('-l', '--layouts', dest='layouts', default=None,
+                      help='Comma separated layouts to run on [Default: every layout]')
+    parser.add_option('-c', '--configurations', dest='configurations', default=None,
+                      help='Comma separated fn:problem[:heuristic] configurations [Default: a standard set]')
+    parser.add_option('-t', '--timeout', dest='timeout', type='float', default=10,
+                      help='Seconds before a run is given up on [Default: %default]')
+    parser.add_option('-o', '--json', dest='json', default=None,
+                      help='Write the results to this JSON file')
+    parser.add_option('--csv', dest='csv', default=None,
+                      help='Write the results to this CSV file')
+    parser.add_option('-b', '--baseline', dest='baseline', default=None,
+                      help='Compare against the results in this JSON file')
+    parser.add_option('--tolerance', dest='tolerance', type='float', default=0.2,
+                      help='Relative increase counted as a regression [Default: %default]')
+    parser.add_option('--minSeconds', dest='minSeconds', type='float', default=0.05,
+                      help='Time increases smaller than this are never regressions [Default: %default]')
+    options, _ = parser.parse_args()
+
+    if options.layouts == None:
+        layouts = sorted([f[:-4] for f in os.listdir('layouts') if f.endswith('.lay')])
+    else:
+        layouts = options.layouts.split(',')
+    for name in layouts:
+        if layout.getLayout(name) == None: raise Exception('The layout ' + name + ' cannot be found')
+    configurations = DEFAULT_CONFIGURATIONS
+    if options.configurations != None: configurations = options.configurations.split(',')
+    configurations = [parseConfiguration(c) for c in configurations]
+
+    print '%-18s %-8s %-22s %-20s %9s %7s %8s %8s %10s' % \
+        ('layout', 'fn', 'problem', 'heuristic', 'expanded', 'cost', 'seconds', 'RSS(MB)', 'nodes/s')
+    rows = []
+    for name in layouts:
+        for fn, prob, heuristic in configurations:
+            row = runOne(name, fn, prob, heuristic, options.timeout)
+            rows.append(row)
+            print formatRow(row)
+            sys.stdout.flush()
+
+    if options.json != None:
+        output = open(options.json, 'w')
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': rows}, output, indent=1)
+        output.close()
+    if options.csv != None:
+        output = open(options.csv, 'wb')
+        writer = csv.DictWriter(output, FIELDS)
+        writer.writerow(dict((f, f) for f in FIELDS))
+        for row in rows:
+            writer.writerow(dict((f, row.get(f)) for f in FIELDS))
+        output.close()
+
+    if options.baseline != None:
+        baseline = json.load(open(options.baseline))['results']
+        regressions = findRegressions(rows, baseline, options.tolerance, options.minSeconds)
+        print
+        if not regressions:
+            print 'No regressions against %s' % options.baseline
+        for row, reason in regressions:
+            print 'REGRESSION %s %s %s %s: %s' % (key(row) + (reason,))
+        if regressions: sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -29,6 +29,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 import cStringIO
 
 
@@ -148,14 +149,17 @@ class Stack:
         "Returns true if the stack is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.list = collections.deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.list.appendleft(item)
 
     def pop(self):
         """
@@ -168,43 +172,94 @@ class Queue:
         "Returns true if the queue is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class PriorityQueue:
     """
       Implements a priority queue data structure. Each inserted item
       has a priority associated with it and the client is usually interested
       in quick retrieval of the lowest-priority item in the queue. This
       data structure allows O(1) access to the lowest-priority item.
+
+      Entries are indexed by item, so update (decrease-key) is O(log n):
+      the old entry is marked as removed and left in the heap, and is
+      skipped when it eventually reaches the top.  Unhashable items are
+      still accepted, but updating one scans the heap in O(n).
     """
+    _REMOVED = object() # placeholder for an entry superseded by update
+
     def  __init__(self):
         self.heap = []
         self.count = 0
+        self.entries = {} # item -> its live heap entry
+        self.removed = 0 # superseded entries still sitting in the heap
 
     def push(self, item, priority):
-        entry = (priority, self.count, item)
+        entry = [priority, self.count, item]
         heapq.heappush(self.heap, entry)
         self.count += 1
+        try:
+            self.entries[item] = entry
+        except TypeError:
+            pass # unhashable items are updated by scanning the heap
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
+        while True:
+            entry = heapq.heappop(self.heap)
+            item = entry[2]
+            if item is not PriorityQueue._REMOVED:
+                break
+            self.removed -= 1
+        try:
+            if self.entries.get(item) is entry:
+                del self.entries[item]
+        except TypeError:
+            pass
         return item
 
     def isEmpty(self):
-        return len(self.heap) == 0
+        heap = self.heap
+        while heap and heap[0][2] is PriorityQueue._REMOVED:
+            heapq.heappop(heap)
+            self.removed -= 1
+        return len(heap) == 0
+
+    def __len__(self):
+        return len(self.heap) - self.removed
+
+    def peekPriority(self):
+        "Returns the lowest priority in the queue, without popping its item."
+        self.isEmpty() # drops superseded entries from the top of the heap
+        return self.heap[0][0]
 
     def update(self, item, priority):
-        # If item already in priority queue with higher priority, update its priority and rebuild the heap.
+        # If item already in priority queue with higher priority, update its priority.
         # If item already in priority queue with equal or lower priority, do nothing.
         # If item not in priority queue, do the same thing as self.push.
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        try:
+            entry = self.entries.get(item)
+        except TypeError:
+            entry = self._findUnhashable(item)
+        if entry is None:
             self.push(item, priority)
+        elif priority < entry[0]:
+            # Keep the original insertion count so ties break as they did before
+            entry[2] = PriorityQueue._REMOVED
+            self.removed += 1
+            newEntry = [priority, entry[1], item]
+            try:
+                self.entries[item] = newEntry
+            except TypeError:
+                pass
+            heapq.heappush(self.heap, newEntry)
+
+    def _findUnhashable(self, item):
+        "Items that cannot be indexed are found by a linear scan, as before."
+        for entry in self.heap:
+            if entry[2] is not PriorityQueue._REMOVED and entry[2] == item:
+                return entry
+        return None
 
 class PriorityQueueWithFunction(PriorityQueue):
     """
@@ -222,6 +277,48 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class LRUCache:
+    """
+    A dictionary holding at most 'capacity' keys.  Once full, storing a new
+    key evicts the least recently used one.  Useful for memoizing
+    heuristics without letting the memo grow with the search.
+
+    >>> c = LRUCache(2)
+    >>> c['a'] = 1; c['b'] = 2; c.get('a'); c['c'] = 3
+    1
+    >>> 'b' in c
+    False
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        "Returns the value stored for key (marking it recently used), or default"
+        try:
+            value = self.data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self.data[key] = value
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self.data:
+            del self.data[key]
+        elif len(self.data) >= self.capacity:
+            self.data.popitem(last=False)
+        self.data[key] = value
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"
@@ -642,6 +739,25 @@ class TimeoutFunction:
                 self.handle_timeout(None, None)
         return result
 
+class CancellationToken:
+    """
+    A flag for stopping a running search from outside, e.g. from a callback
+    consuming its events, or after timeout seconds.  Unlike TimeoutFunction
+    it needs no signals: the search checks the token between expansions.
+    """
+    def __init__(self, timeout=None):
+        self.cancelled = False
+        self.deadline = None
+        if timeout != None: self.deadline = time.time() + timeout
+
+    def cancel(self):
+        self.cancelled = True
+
+    def isCancelled(self):
+        if not self.cancelled and self.deadline != None and time.time() >= self.deadline:
+            self.cancelled = True
+        return self.cancelled
+
 
 
 _ORIGINAL_STDOUT = None
@@ -142,6 +142,19 @@ def run(lay, layName, pac, ghosts, disp, nGames=1, name='games'):
     print '*** Won %d out of %d games. Average score: %f ***' % (stats['wins'], len(games), sum(stats['scores']) * 1.0 / len(games))
     return stats
 
+def runExploring(lay, layName, pac, ghosts, disp, name='games'):
+    """
+    Runs a game as run does, with GameState keeping the distinct states
+    explored for GradingAgent and PolyAgent to count, and then puts
+    GameState's exploration tracking back as it was.
+    """
+    oldMode, oldLimit = GameState.exploreMode, GameState.exploredLimit
+    GameState.setExploreMode(GameState.EXPLORE_SET)
+    try:
+        return run(lay, layName, pac, ghosts, disp, name=name)
+    finally:
+        GameState.setExploreMode(oldMode, oldLimit)
+
 class GradingAgent(Agent):
     def __init__(self, seed, studentAgent, optimalActions, altDepthActions, partialPlyBugActions):
         # save student agent and actions of refernce agents
@@ -310,7 +323,7 @@ class PacmanGameTreeTest(testClasses.TestCase):
         pac = GradingAgent(self.seed, studentAgent, allActions, altDepthActions, partialPlyBugActions)
         # check return codes and assign grades
         disp = self.question.getDisplay()
-        stats = run(lay, self.layout_name, pac, [DirectionalGhost(i + 1) for i in range(2)], disp, name=self.alg)
+        stats = runExploring(lay, self.layout_name, pac, [DirectionalGhost(i + 1) for i in range(2)], disp, name=self.alg)
         if stats['timeouts'] > 0:
             self.addMessage('Agent timed out on smallClassic.  No credit')
             return self.testFail(grades)
@@ -358,7 +371,7 @@ class PacmanGameTreeTest(testClasses.TestCase):
             ourPacOptions = {}
         pac = PolyAgent(self.seed, multiAgents, ourPacOptions, self.depth)
         disp = self.question.getDisplay()
-        run(lay, self.layout_name, pac, [DirectionalGhost(i + 1) for i in range(2)], disp, name=self.alg)
+        runExploring(lay, self.layout_name, pac, [DirectionalGhost(i + 1) for i in range(2)], disp, name=self.alg)
         (optimalActions, altDepthActions, partialPlyBugActions) = pac.getTraces()
         # recover traces and record to file
         handle = open(filePath, 'w')
@@ -0,0 +1,112 @@
+# stateMemoryBenchmark.py
+# -----------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Measures the memory a GameState costs when an agent keeps many of them, as
+game tree search and learning agents do.
+
+Every successor of every state along a random game is generated and kept,
+and the memory they hold is reported per state in two ways: by walking the
+objects each state reaches (counting objects shared between states, such as
+the layout and unchanged food grids, once), and by the growth of the
+process' peak resident set.  It only uses GameState's public methods, so the
+same script measures older versions of pacman.py and game.py too.
+
+> python stateMemoryBenchmark.py
+> python stateMemoryBenchmark.py -l originalClassic -n 100000
+"""
+
+import sys
+import time
+import random
+import resource
+import optparse
+
+import pacman
+import layout
+
+def sizeOf(obj, seen):
+    """
+    Returns the bytes used by obj and everything it reaches, leaving out
+    the objects whose ids are in seen and adding the rest to it.
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen: continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        if hasattr(o, '__dict__'):
+            stack.append(o.__dict__)
+        for name in getattr(type(o), '__slots__', ()):
+            if hasattr(o, name): stack.append(getattr(o, name))
+    return total
+
+def generateStates(start, numStates, rng):
+    """
+    Returns numStates states: all the successors of the states along a
+    random game from start, restarting whenever the game ends.
+    """
+    states = []
+    state = start
+    while len(states) < numStates:
+        if state.isWin() or state.isLose():
+            state = start
+            continue
+        for agentIndex in range(state.getNumAgents()):
+            successors = [state.generateSuccessor(agentIndex, action)
+                          for action in state.getLegalActions(agentIndex)]
+            states.extend(successors)
+            state = rng.choice(successors)
+            if state.isWin() or state.isLose(): break
+    return states[:numStates]
+
+def peakMemory():
+    "The peak resident set of this process, in bytes."
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+if __name__ == '__main__':
+    parser = optparse.OptionParser()
+    parser.add_option('-l', '--layout', dest='layout', default='mediumClassic',
+                      help='The layout to play on [Default: %default]')
+    parser.add_option('-n', '--numStates', dest='numStates', type='int', default=50000,
+                      help='The number of states to keep [Default: %default]')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0,
+                      help='The random seed [Default: %default]')
+    options, otherjunk = parser.parse_args()
+
+    start = pacman.GameState()
+    start.initialize(layout.getLayout(options.layout), 2)
+
+    before = peakMemory()
+    began = time.time()
+    states = generateStates(start, options.numStates, random.Random(options.seed))
+    elapsed = time.time() - began
+    after = peakMemory()
+
+    # The start state and the layout it shares with every other state are not counted
+    seen = set()
+    sizeOf(start, seen)
+    walked = sum([sizeOf(state, seen) for state in states])
+
+    n = len(states)
+    print '%d states on %s, generated in %.2fs' % (n, options.layout, elapsed)
+    print '  %6.0f bytes per GameState (object walk)' % (float(walked) / n)
+    print '  %6.0f bytes per GameState (peak resident set)' % (float(after - before) / n)
@@ -0,0 +1,426 @@
+# batchSimulator.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A vectorized simulator of classic Pacman, for running many rollouts quickly.
+
+A BatchSimulator plays B games on one layout in lockstep, following
+ClassicGameRules, PacmanRules and GhostRules in pacman.py exactly, but
+without any GameState objects.  The games are kept as a struct of NumPy
+arrays: Pacman's cell, the scores and the status of every game are arrays
+of length B, the ghosts' positions, directions and scared timers are B x G
+arrays, and food and capsules are B x cells boolean arrays (cell
+x * height + y).  Ghosts can be moved at half speed while scared, so their
+positions are kept in half-cell units.
+
+Each call to step takes one action per game for Pacman, as an index into
+ACTIONS, and moves Pacman in every running game with a handful of array
+operations; then each ghost in turn moves in every game that is still
+going, with the RandomGhost or DirectionalGhost policy of ghostAgents.py.
+Legal moves come from per-cell tables, so the only Python loop is over
+the G ghosts, which move one after another as in pacman.py.
+
+By default each game has its own random.Random, seeded from seeds, and
+the ghosts draw one number from it per move just as the ghost agents draw
+from the random module, so a game started from seed s plays like a
+pacman.py game after random.seed(s).  Drawing those numbers is the one
+per-game cost left; with matchPacman=False they come from one NumPy
+RandomState seeded with all the seeds instead, which is faster but ties
+each game to the rest of its batch.
+
+  sim = BatchSimulator(layout.getLayout('mediumClassic'), seeds=range(256))
+  while sim.numRunning() > 0:
+      sim.step([random.choice(sim.getLegalPacmanActions(b)) for b in range(sim.batchSize)])
+
+Run this file to check the simulator against pacman.py on the shipped
+layouts, and to time both:
+
+  python batchSimulator.py --parity
+  python batchSimulator.py --benchmark -l mediumClassic -b 512
+"""
+
+import os
+import sys
+import time
+import random
+import optparse
+import numpy as np
+
+from game import Directions, Actions
+import pacman
+import layout as layouts
+import ghostAgents
+
+# Action indices, in the order pacman.py lists legal actions
+ACTIONS = [direction for direction, vector in Actions._directionsAsList]
+ACTION_INDEX = dict((direction, i) for i, direction in enumerate(ACTIONS))
+VECTORS = [Actions._directions[direction] for direction in ACTIONS]
+STOP = ACTION_INDEX[Directions.STOP]
+REVERSE = [ACTION_INDEX[Actions.reverseDirection(direction)] for direction in ACTIONS]
+
+# Per action: its move in cells, and its place among the actions sorted by
+# name, the order util.sample walks a distribution in
+DX = np.array([int(dx) for dx, dy in VECTORS])
+DY = np.array([int(dy) for dx, dy in VECTORS])
+BY_NAME = np.array(sorted(range(len(ACTIONS)), key=lambda a: ACTIONS[a]))
+ONLY = np.eye(len(ACTIONS), dtype=bool) # ONLY[a]: a mask allowing just action a
+
+RUNNING, WON, LOST = 0, 1, 2
+
+RANDOM_GHOST = 'RandomGhost'
+DIRECTIONAL_GHOST = 'DirectionalGhost'
+
+# Ghosts kill (or are eaten) within this Manhattan distance, in half cells
+KILL_DISTANCE = int(2 * pacman.COLLISION_TOLERANCE)
+
+class BatchSimulator:
+    def __init__(self, layout, batchSize=None, seeds=None, numGhosts=None, ghostType=RANDOM_GHOST,
+                 prob_attack=0.8, prob_scaredFlee=0.8, matchPacman=True):
+        """
+        layout: a Layout (layout.py)
+        batchSize: the number of games, by default len(seeds)
+        seeds: a seed for each game, by default drawn from the random module
+        numGhosts: the most ghosts to use, as -k in pacman.py
+        ghostType: RANDOM_GHOST or DIRECTIONAL_GHOST, with DirectionalGhost's
+          prob_attack and prob_scaredFlee
+        matchPacman: draw each game's ghost moves from its own random.Random,
+          so that games match pacman.py (see above)
+        """
+        if seeds == None:
+            seeds = [random.getrandbits(32) for b in range(batchSize)]
+        if batchSize == None: batchSize = len(seeds)
+        if len(seeds) != batchSize: raise Exception('One seed is needed per game')
+        if ghostType not in [RANDOM_GHOST, DIRECTIONAL_GHOST]:
+            raise Exception('Unknown ghost type: ' + str(ghostType))
+        self.layout = layout
+        self.batchSize = batchSize
+        self.seeds = list(seeds)
+        self.directional = ghostType == DIRECTIONAL_GHOST
+        self.prob_attack = prob_attack
+        self.prob_scaredFlee = prob_scaredFlee
+        self.matchPacman = matchPacman
+        if numGhosts == None: numGhosts = layout.getNumGhosts()
+
+        # The starting positions, as pacman.py places the agents
+        start = pacman.GameState()
+        start.initialize(layout, numGhosts)
+        self.numGhosts = start.getNumAgents() - 1
+        self.height = height = layout.height
+        self.numCells = numCells = layout.width * height
+        self.pacmanStart = self.cellOf(start.getPacmanPosition())
+        self.ghostStartX = np.array([2 * int(x) for x, y in start.getGhostPositions()], dtype=int)
+        self.ghostStartY = np.array([2 * int(y) for x, y in start.getGhostPositions()], dtype=int)
+        self.startFood = self.cellMask(layout.food.asList())
+        self.startCapsules = self.cellMask(layout.capsules)
+
+        # Per cell: Pacman's legal actions and the cell step each action takes.
+        # A ghost's legal actions also depend on the way it is facing, so
+        # they are kept per cell * len(ACTIONS) + facing.
+        openCells = np.zeros(numCells, dtype=bool)
+        for x, y in layout.walls.asList(False): openCells[x * height + y] = True
+        self.steps = DX * height + DY
+        self.pacmanLegal = np.zeros((numCells, len(ACTIONS)), dtype=bool)
+        self.ghostLegal = np.zeros((numCells * len(ACTIONS), len(ACTIONS)), dtype=bool)
+        for cell in np.flatnonzero(openCells):
+            legal = [a for a in range(len(ACTIONS)) if openCells[cell + self.steps[a]]]
+            self.pacmanLegal[cell, legal] = True
+            for facing in range(len(ACTIONS)):
+                possible = [a for a in legal if a != STOP]
+                if REVERSE[facing] in possible and len(possible) > 1: possible.remove(REVERSE[facing])
+                self.ghostLegal[cell * len(ACTIONS) + facing, possible] = True
+
+        self.reset()
+
+    def cellOf(self, position):
+        x, y = position
+        return int(x) * self.height + int(y)
+
+    def cellMask(self, positions):
+        mask = np.zeros(self.numCells, dtype=bool)
+        for position in positions: mask[self.cellOf(position)] = True
+        return mask
+
+    def reset(self):
+        "Starts every game again from its seed."
+        B, G = self.batchSize, self.numGhosts
+        self.pacman = np.full(B, self.pacmanStart, dtype=int)
+        self.food = np.tile(self.startFood, (B, 1))
+        self.foodLeft = np.full(B, self.startFood.sum(), dtype=int)
+        self.capsules = np.tile(self.startCapsules, (B, 1))
+        self.ghostX = np.tile(self.ghostStartX, (B, 1))
+        self.ghostY = np.tile(self.ghostStartY, (B, 1))
+        self.ghostDirection = np.full((B, G), STOP, dtype=int)
+        self.scaredTimer = np.zeros((B, G), dtype=int)
+        self.score = np.zeros(B, dtype=int)
+        self.status = np.full(B, RUNNING, dtype=np.int8)
+        self.moves = np.zeros(B, dtype=int)
+        if self.matchPacman:
+            self.rngs = [random.Random(seed) for seed in self.seeds]
+        else:
+            self.rng = np.random.RandomState([seed & 0xffffffff for seed in self.seeds])
+
+    def numRunning(self):
+        return int(np.count_nonzero(self.status == RUNNING))
+
+    def getLegalPacmanActions(self, b):
+        "Pacman's legal actions in game b, as indices into ACTIONS."
+        if self.status[b] != RUNNING: return ()
+        return tuple(np.flatnonzero(self.pacmanLegal[self.pacman[b]]))
+
+    def getLegalPacmanMask(self):
+        "A B x len(ACTIONS) boolean array of Pacman's legal actions in every game."
+        return self.pacmanLegal[self.pacman] & (self.status == RUNNING)[:, None]
+
+    def getPacmanPosition(self, b):
+        return divmod(int(self.pacman[b]), self.height)
+
+    def getGhostPositions(self, b):
+        "Ghost positions in game b, in cells (halves while a ghost is scared)."
+        return [(x / 2.0, y / 2.0) for x, y in zip(self.ghostX[b], self.ghostY[b])]
+
+    def step(self, pacmanActions):
+        """
+        Plays a round of every running game: Pacman takes pacmanActions[b]
+        (an index into ACTIONS) in game b, then each ghost moves, unless
+        the game ends first.  Returns the change in each game's score.
+        """
+        before = self.score.copy()
+        games = np.flatnonzero(self.status == RUNNING)
+        if len(games):
+            self.movePacman(games, np.asarray(pacmanActions, dtype=int)[games])
+        for k in range(self.numGhosts):
+            games = np.flatnonzero(self.status == RUNNING)
+            if len(games): self.moveGhost(games, k)
+        return self.score - before
+
+    def movePacman(self, games, actions):
+        "PacmanRules.applyAction, then the time penalty and GhostRules.checkDeath."
+        cells = self.pacman[games]
+        illegal = ~self.pacmanLegal[cells, actions]
+        if illegal.any():
+            raise Exception('Illegal action ' + str(ACTIONS[actions[np.argmax(illegal)]]))
+        cells = cells + self.steps[actions]
+        self.pacman[games] = cells
+        self.moves[games] += 1
+
+        ate = self.food[games, cells]
+        self.food[games, cells] = False
+        self.foodLeft[games] -= ate
+        won = ate & (self.foodLeft[games] == 0)
+        self.score[games] += 10 * ate + 500 * won - pacman.TIME_PENALTY
+        self.status[games[won]] = WON
+
+        capsule = self.capsules[games, cells]
+        self.capsules[games, cells] = False
+        self.scaredTimer[games[capsule]] = pacman.SCARED_TIME
+
+        x2, y2 = 2 * (cells // self.height), 2 * (cells % self.height)
+        for k in range(self.numGhosts):
+            self.collide(games, k, x2, y2)
+
+    def moveGhost(self, games, k):
+        """
+        Picks ghost k's action in every game and applies
+        GhostRules.applyAction, decrementTimer and checkDeath.
+        """
+        x2, y2 = self.ghostX[games, k], self.ghostY[games, k]
+        timer, facing = self.scaredTimer[games, k], self.ghostDirection[games, k]
+        # In between grid points, ghosts carry straight on
+        onGrid = (x2 % 2 == 0) & (y2 % 2 == 0)
+        cells = (x2 // 2) * self.height + y2 // 2
+        legal = np.where(onGrid[:, None], self.ghostLegal[cells * len(ACTIONS) + facing], ONLY[facing])
+
+        cells = self.pacman[games]
+        px2, py2 = 2 * (cells // self.height), 2 * (cells % self.height)
+        actions = self.chooseGhostActions(games, legal, x2, y2, timer, px2, py2)
+
+        speed = np.where(timer > 0, 1, 2)
+        x2 = x2 + DX[actions] * speed
+        y2 = y2 + DY[actions] * speed
+        ending = timer == 1 # nearestPoint, as the ghost speeds up again
+        x2 = np.where(ending, 2 * ((x2 + 1) // 2), x2)
+        y2 = np.where(ending, 2 * ((y2 + 1) // 2), y2)
+        self.ghostX[games, k], self.ghostY[games, k] = x2, y2
+        self.ghostDirection[games, k] = actions
+        self.scaredTimer[games, k] = np.maximum(timer - 1, 0)
+        self.moves[games] += 1
+
+        self.collide(games, k, px2, py2)
+
+    def collide(self, games, k, px2, py2):
+        "GhostRules.collide for ghost k, in the games where it touches Pacman at (px2, py2)."
+        touching = np.abs(self.ghostX[games, k] - px2) + np.abs(self.ghostY[games, k] - py2) <= KILL_DISTANCE
+        games = games[touching]
+        scared = self.scaredTimer[games, k] > 0
+
+        eaten = games[scared]
+        self.score[eaten] += 200
+        self.ghostX[eaten, k], self.ghostY[eaten, k] = self.ghostStartX[k], self.ghostStartY[k]
+        self.ghostDirection[eaten, k] = STOP
+        self.scaredTimer[eaten, k] = 0
+
+        killed = games[~scared]
+        killed = killed[self.status[killed] != WON]
+        self.score[killed] -= 500
+        self.status[killed] = LOST
+
+    def chooseGhostActions(self, games, legal, x2, y2, timer, px2, py2):
+        """
+        Samples an action for a ghost in each of games, from its legal
+        actions (a boolean mask per game), as GhostAgent.getAction does.
+        """
+        numLegal = legal.sum(1)
+        if self.directional:
+            # DirectionalGhost.getDistribution, in half cells
+            scared = timer > 0
+            speed = np.where(scared, 1, 2)[:, None]
+            distances = np.abs(x2[:, None] + DX * speed - px2[:, None]) + \
+                        np.abs(y2[:, None] + DY * speed - py2[:, None])
+            farthest = np.where(legal, distances, -1).max(1)
+            nearest = np.where(legal, distances, sys.maxint).min(1)
+            bestScore = np.where(scared, farthest, nearest)
+            bestProb = np.where(scared, self.prob_scaredFlee, self.prob_attack)
+            best = legal & (distances == bestScore[:, None])
+            numBest = np.maximum(best.sum(1), 1)
+            probabilities = np.where(best, (bestProb / numBest)[:, None], 0.0) + \
+                            np.where(legal, ((1 - bestProb) / np.maximum(numLegal, 1))[:, None], 0.0)
+        else:
+            probabilities = legal.astype(float)
+
+        # Counter.normalize, then util.sample: walk the actions in name order
+        # until their cumulative probability reaches a uniform draw.  A ghost
+        # with no legal action stops without drawing.
+        moving = numLegal > 0
+        probabilities = probabilities[moving]
+        probabilities = probabilities / probabilities.sum(1)[:, None]
+        probabilities, legal = probabilities[:, BY_NAME], legal[moving][:, BY_NAME]
+        total = probabilities[:, 0]
+        for a in range(1, len(ACTIONS)): total = total + probabilities[:, a]
+        probabilities = np.where((total != 1)[:, None], probabilities / total[:, None], probabilities)
+        cumulative = probabilities.copy()
+        for a in range(1, len(ACTIONS)): cumulative[:, a] = cumulative[:, a - 1] + probabilities[:, a]
+
+        if self.matchPacman:
+            rngs = self.rngs
+            choices = np.array([rngs[b].random() for b in games[moving]])
+        else:
+            choices = self.rng.random_sample(len(cumulative))
+        reached = legal & (choices[:, None] <= cumulative)
+        short = ~reached.any(1) # rounding left the total just below the draw
+        lastLegal = len(ACTIONS) - 1 - np.argmax(legal[:, ::-1], 1)
+        reached[short, lastLegal[short]] = True
+
+        actions = np.full(len(games), STOP, dtype=int)
+        actions[moving] = BY_NAME[np.argmax(reached, 1)]
+        return actions
+
+def playReference(layout, seed, numGhosts, ghostType, pacmanChoices, maxRounds):
+    """
+    Plays a game with pacman.py's GameState after random.seed(seed), Pacman
+    picking among its legal actions with pacmanChoices.  Returns Pacman's
+    actions and the trace checkParity compares.
+    """
+    random.seed(seed)
+    state = pacman.GameState()
+    state.initialize(layout, numGhosts)
+    ghosts = [getattr(ghostAgents, ghostType)(i + 1) for i in range(state.getNumAgents() - 1)]
+    actions, trace = [], []
+    while not (state.isWin() or state.isLose()) and len(actions) < maxRounds:
+        action = pacmanChoices.choice(state.getLegalActions(0))
+        actions.append(ACTION_INDEX[action])
+        state = state.generateSuccessor(0, action)
+        for ghost in ghosts:
+            if state.isWin() or state.isLose(): break
+            state = state.generateSuccessor(ghost.index, ghost.getAction(state))
+        trace.append((int(state.getScore()), state.getPacmanPosition(), state.getGhostPositions(),
+                      [g.scaredTimer for g in state.getGhostStates()], state.isWin(), state.isLose()))
+    return actions, trace
+
+def checkParity(layoutNames, seeds, ghostType, numGhosts=4, maxRounds=300):
+    """
+    Plays each layout from each seed in pacman.py and, as one batch, in a
+    BatchSimulator, and returns the games whose score, positions, scared
+    timers or outcome ever differ, as (layout, seed, round) triples.
+    """
+    mismatches = []
+    for name in layoutNames:
+        layout = layouts.getLayout(name)
+        games = [playReference(layout, seed, numGhosts, ghostType, random.Random(seed + 1), maxRounds) for seed in seeds]
+        sim = BatchSimulator(layout, seeds=seeds, numGhosts=numGhosts, ghostType=ghostType)
+        for r in range(max([len(actions) for actions, trace in games])):
+            sim.step([actions[r] if r < len(actions) else STOP for actions, trace in games])
+            for b, (actions, trace) in enumerate(games):
+                if r >= len(trace): continue
+                observed = (int(sim.score[b]), sim.getPacmanPosition(b), sim.getGhostPositions(b),
+                            list(sim.scaredTimer[b]), sim.status[b] == WON, sim.status[b] == LOST)
+                if observed != trace[r] and (name, seeds[b]) not in [m[:2] for m in mismatches]:
+                    mismatches.append((name, seeds[b], r))
+    return mismatches
+
+def benchmark(layout, batchSize, ghostType, numGhosts=4, seed=0):
+    """
+    Plays batchSize games with a random Pacman in a BatchSimulator, with
+    and without matchPacman, and in pacman.py, and returns the games per
+    second of each.
+    """
+    rates = []
+    for matchPacman in [True, False]:
+        chooser = np.random.RandomState(seed)
+        sim = BatchSimulator(layout, seeds=range(seed, seed + batchSize), numGhosts=numGhosts,
+                             ghostType=ghostType, matchPacman=matchPacman)
+        start = time.time()
+        while sim.numRunning() > 0:
+            # A uniformly random legal action in every game at once
+            legal = sim.getLegalPacmanMask()
+            sim.step(np.argmax(np.where(legal, chooser.random_sample(legal.shape), -1), 1))
+        rates.append(batchSize / (time.time() - start))
+
+    chooser = random.Random(seed)
+    start = time.time()
+    for b in range(batchSize):
+        playReference(layout, seed + b, numGhosts, ghostType, chooser, sys.maxint)
+    rates.append(batchSize / (time.time() - start))
+    return rates
+
+if __name__ == '__main__':
+    parser = optparse.OptionParser()
+    parser.add_option('--parity', action='store_true', dest='parity', default=False,
+                      help='Check the simulator against pacman.py on every layout')
+    parser.add_option('--benchmark', action='store_true', dest='benchmark', default=False,
+                      help='Time the simulator and pacman.py')
+    parser.add_option('-l', '--layout', dest='layout', default='mediumClassic',
+                      help='The layout to benchmark on [Default: %default]')
+    parser.add_option('-b', '--batchSize', dest='batchSize', type='int', default=256,
+                      help='The number of games to benchmark [Default: %default]')
+    parser.add_option('-s', '--seeds', dest='seeds', type='int', default=10,
+                      help='The number of seeds to check each layout with [Default: %default]')
+    options, otherjunk = parser.parse_args()
+
+    if options.parity:
+        names = sorted([f[:-4] for f in os.listdir('layouts') if f.endswith('.lay')])
+        failed = False
+        for ghostType in [RANDOM_GHOST, DIRECTIONAL_GHOST]:
+            mismatches = checkParity(names, range(options.seeds), ghostType)
+            print '%s: %d layouts x %d seeds, %d games differ' % (ghostType, len(names), options.seeds, len(mismatches))
+            for name, seed, r in mismatches:
+                print '  %s seed %d differs from round %d' % (name, seed, r)
+            failed = failed or mismatches
+        if failed: sys.exit(1)
+
+    if options.benchmark:
+        layout = layouts.getLayout(options.layout)
+        for ghostType in [RANDOM_GHOST, DIRECTIONAL_GHOST]:
+            matched, unmatched, reference = benchmark(layout, options.batchSize, ghostType)
+            print '%s on %s: %.1f games/s batched (%.1f without matchPacman), %.1f in pacman.py (%.1fx, %.1fx)' % \
+                (ghostType, options.layout, matched, unmatched, reference, matched / reference, unmatched / reference)
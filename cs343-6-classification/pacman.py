@@ -43,6 +43,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 from util import nearestPoint
 from util import manhattanDistance
 import util, layout
@@ -52,7 +53,7 @@ import sys, types, time, random, os
 # YOUR INTERFACE TO THE PACMAN WORLD: A GameState #
 ###################################################
 
-class GameState:
+class GameState(object):
     """
     A GameState specifies the full game state, including the food, capsules,
     agent configurations and score changes.
@@ -71,14 +72,44 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
+    # Optional tracking of the states generateSuccessor is called on and
+    # returns, e.g. for the autograder to count the states a search explores.
+    # It is off by default; EXPLORE_COUNT only counts generateSuccessor calls,
+    # and EXPLORE_SET keeps the distinct states, at most exploredLimit of them.
+    EXPLORE_OFF = 'off'
+    EXPLORE_COUNT = 'count'
+    EXPLORE_SET = 'set'
+    exploreMode = EXPLORE_OFF
     explored = set()
+    exploredCount = 0
+    exploredLimit = 1000000
+
+    def setExploreMode(mode, limit=None):
+        "Turns exploration tracking on (EXPLORE_COUNT or EXPLORE_SET) or off, and resets it."
+        if mode not in [GameState.EXPLORE_OFF, GameState.EXPLORE_COUNT, GameState.EXPLORE_SET]:
+            raise Exception('Unknown exploration tracking mode: ' + str(mode))
+        GameState.exploreMode = mode
+        if limit != None: GameState.exploredLimit = limit
+        GameState.explored = set()
+        GameState.exploredCount = 0
+    setExploreMode = staticmethod(setExploreMode)
+
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
+        "Returns the states explored since the last call (EXPLORE_SET mode only)."
+        tmp = GameState.explored
         GameState.explored = set()
+        GameState.exploredCount = 0
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def getAndResetExploredCount():
+        "Returns the number of generateSuccessor calls since the last reset."
+        count = GameState.exploredCount
+        GameState.explored = set()
+        GameState.exploredCount = 0
+        return count
+    getAndResetExploredCount = staticmethod(getAndResetExploredCount)
+
     def getLegalActions( self, agentIndex=0 ):
         """
         Returns the legal actions for the agent specified.
@@ -112,7 +143,7 @@ class GameState:
         if agentIndex == 0:
             state.data.scoreChange += -TIME_PENALTY # Penalty for waiting around
         else:
-            GhostRules.decrementTimer( state.data.agentStates[agentIndex] )
+            GhostRules.decrementTimer( state.data.getWritableAgentState(agentIndex) )
 
         # Resolve multi-agent effects
         GhostRules.checkDeath( state, agentIndex )
@@ -120,8 +151,12 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.exploreMode != GameState.EXPLORE_OFF:
+            GameState.exploredCount += 1
+            explored = GameState.explored
+            if GameState.exploreMode == GameState.EXPLORE_SET and len(explored) < GameState.exploredLimit:
+                explored.add(self)
+                explored.add(state)
         return state
 
     def getLegalPacmanActions( self ):
@@ -171,7 +206,7 @@ class GameState:
         """
         Returns a list of positions (x,y) of the remaining capsules.
         """
-        return self.data.capsules
+        return self.data.getWritableCapsules()
 
     def getNumFood( self ):
         return self.data.food.count()
@@ -186,7 +221,7 @@ class GameState:
         currentFood = state.getFood()
         if currentFood[x][y] == True: ...
         """
-        return self.data.food
+        return self.data.getWritableFood()
 
     def getWalls(self):
         """
@@ -217,6 +252,8 @@ class GameState:
     # You shouldn't need to call these directly #
     #############################################
 
+    __slots__ = ('data',)
+
     def __init__( self, prevState = None ):
         """
         Generates a new state by copying information from its predecessor.
@@ -243,6 +280,12 @@ class GameState:
         """
         return hash( self.data )
 
+    def __getstate__( self ):
+        return self.data
+
+    def __setstate__( self, data ):
+        self.data = data
+
     def __str__( self ):
 
         return str(self.data)
@@ -331,7 +374,7 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions( state.getPacmanState().configuration, state.data.layout.walls )
+        return Actions.getPossibleActions( state.data.agentStates[0].configuration, state.data.layout.walls )
     getLegalActions = staticmethod( getLegalActions )
 
     def applyAction( state, action ):
@@ -342,11 +385,17 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.getWritableAgentState(0)
 
-        # Update Configuration
-        vector = Actions.directionToVector( action, PacmanRules.PACMAN_SPEED )
-        pacmanState.configuration = pacmanState.configuration.generateSuccessor( vector )
+        # Update Configuration, from the layout's table on a grid point
+        conf = pacmanState.configuration
+        successors = Actions.getActionTable( state.data.layout.walls ).successors.get( conf.pos )
+        if successors != None and PacmanRules.PACMAN_SPEED == 1:
+            direction = conf.direction if action == Directions.STOP else action
+            pacmanState.configuration = Configuration( successors[action], direction )
+        else:
+            vector = Actions.directionToVector( action, PacmanRules.PACMAN_SPEED )
+            pacmanState.configuration = conf.generateSuccessor( vector )
 
         # Eat
         next = pacmanState.configuration.getPosition()
@@ -361,8 +410,7 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.removeFood( position )
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -370,12 +418,12 @@ class PacmanRules:
                 state.data.scoreChange += 500
                 state.data._win = True
         # Eat capsule
-        if( position in state.getCapsules() ):
-            state.data.capsules.remove( position )
+        if( position in state.data.capsules ):
+            state.data.removeCapsule( position )
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range( 1, len( state.data.agentStates ) ):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.getWritableAgentState(index).scaredTimer = SCARED_TIME
     consume = staticmethod( consume )
 
 class GhostRules:
@@ -404,7 +452,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.getWritableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0: speed /= 2.0
         vector = Actions.directionToVector( action, speed )
@@ -414,7 +462,8 @@ class GhostRules:
     def decrementTimer( ghostState):
         timer = ghostState.scaredTimer
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint( ghostState.configuration.pos )
+            conf = ghostState.configuration
+            ghostState.configuration = Configuration( nearestPoint( conf.pos ), conf.direction )
         ghostState.scaredTimer = max( 0, timer - 1 )
     decrementTimer = staticmethod( decrementTimer )
 
@@ -435,10 +484,12 @@ class GhostRules:
 
     def collide( state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
+            ghostState = state.data.getWritableAgentState(agentIndex)
             state.data.scoreChange += 200
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
             # Added for first-person
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -512,7 +563,9 @@ def readCommand( argv ):
     parser.add_option('-r', '--recordActions', action='store_true', dest='record',
                       help='Writes game histories to a file (named by the time they were played)', default=False)
     parser.add_option('--replay', dest='gameToReplay',
-                      help='A recorded game file (pickle) to replay', default=None)
+                      help='A recorded game file (replay or pickle) to replay', default=None)
+    parser.add_option('--replayFrom', dest='replayFrom', type='int',
+                      help=default('The move to start a replay from'), default=0)
     parser.add_option('-a','--agentArgs',dest='agentArgs',
                       help='Comma separated values sent to agent. e.g. "opt1=val1,opt2,opt3=val3"')
     parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
@@ -523,6 +576,8 @@ def readCommand( argv ):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--workers', dest='workers', type='int',
+                      help=default('Play the games (after any training games) in this many processes, without graphics'), default=1)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -556,7 +611,7 @@ def readCommand( argv ):
     args['ghosts'] = [ghostType( i+1 ) for i in range( options.numGhosts )]
 
     # Choose a display format
-    if options.quietGraphics:
+    if options.quietGraphics or options.workers > 1:
         import textDisplay
         args['display'] = textDisplay.NullGraphics()
     elif options.textGraphics:
@@ -570,10 +625,17 @@ def readCommand( argv ):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['workers'] = options.workers
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
         print 'Replaying recorded game %s.' % options.gameToReplay
+        import replay
+        if replay.isReplayFile(options.gameToReplay):
+            recorded = replay.loadReplay(options.gameToReplay, newReplayState)
+            replayGame(recorded.layout, recorded.getActions(options.replayFrom), args['display'],
+                       recorded.stateAt(options.replayFrom))
+            sys.exit(0)
         import cPickle
         f = open(options.gameToReplay)
         try: recorded = cPickle.load(f)
@@ -607,12 +669,17 @@ def loadAgent(pacman, nographics):
                 return getattr(module, pacman)
     raise Exception('The agent ' + pacman + ' is not specified in any *Agents.py.')
 
-def replayGame( layout, actions, display ):
+def replayGame( layout, actions, display, state = None ):
+    """
+    Shows the (agentIndex, action) pairs of a recorded game being played,
+    from the start or, if state is given, from state.
+    """
     import pacmanAgents, ghostAgents
     rules = ClassicGameRules()
-    agents = [pacmanAgents.GreedyAgent()] + [ghostAgents.RandomGhost(i+1) for i in range(layout.getNumGhosts())]
+    numGhosts = layout.getNumGhosts() if state == None else state.getNumAgents() - 1
+    agents = [pacmanAgents.GreedyAgent()] + [ghostAgents.RandomGhost(i+1) for i in range(numGhosts)]
     game = rules.newGame( layout, agents[0], agents[1:], display )
-    state = game.state
+    if state == None: state = game.state
     display.initialize(state.data)
 
     for action in actions:
@@ -625,14 +692,115 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
-def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30 ):
+def newReplayState( layout, numAgents ):
+    "The starting state of a recorded game, for replay.py."
+    state = GameState()
+    state.initialize( layout, numAgents - 1 )
+    return state
+
+def recordGame( layout, game, i ):
+    """
+    Writes the history of game number i (from 0) to a replay file (see
+    replay.py) named by the time it was played.
+    """
+    import time, replay
+    fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
+    f = file(fname, 'wb')
+    try:
+        writer = replay.ReplayWriter(f)
+        writer.addGame('classic', newReplayState(layout, len(game.agents)), game.moveHistory,
+                       {'score': game.state.getScore()})
+    finally:
+        f.close()
+
+class GameResult:
+    """
+    What a worker process sends back of a game it played (see --workers):
+    the game's number, its final state and move history, and whether an
+    agent timed out or crashed.  runGamesInParallel turns it back into a Game.
+    """
+    def __init__( self, index, game ):
+        self.index = index
+        self.state = game.state
+        self.moveHistory = game.moveHistory
+        self.agentTimeout = game.agentTimeout
+        self.agentCrashed = game.agentCrashed
+        self.totalAgentTimes = game.totalAgentTimes
+
+    def toGame( self, rules, layout, pacman, ghosts, display, catchExceptions ):
+        "Returns a finished Game in this process, as runGames returns it."
+        game = rules.newGame( layout, pacman, ghosts, display, True, catchExceptions )
+        game.state = self.state
+        game.moveHistory = self.moveHistory
+        game.agentTimeout = self.agentTimeout
+        game.agentCrashed = self.agentCrashed
+        game.totalAgentTimes = self.totalAgentTimes
+        game.gameOver = True
+        return game
+
+# The runGames arguments, for the worker processes, which inherit them
+_parallelGames = {}
+
+def _playGame( task ):
+    "Plays one game in a worker process, without graphics."
+    i, seed = task
+    import textDisplay
+    import __main__
+    random.seed(seed)
+    display = textDisplay.NullGraphics()
+    __main__.__dict__['_display'] = display
+    p = _parallelGames
+    rules = ClassicGameRules(p['timeout'])
+    game = rules.newGame( p['layout'], p['pacman'], p['ghosts'], display, True, p['catchExceptions'])
+    game.run()
+    if p['record']: recordGame(p['layout'], game, i)
+    return GameResult(i, game)
+
+def runGamesInParallel( layout, pacman, ghosts, display, first, seeds, record, catchExceptions, timeout, workers ):
+    """
+    Plays games first to first + len(seeds) - 1 in a pool of worker
+    processes and returns them, in order.  Game i is seeded with
+    seeds[i - first], so the results do not depend on the number of
+    workers or the order games finish in.  The workers are forked from this process, so they start
+    with the agents as they are now (e.g. after training).
+    """
+    import multiprocessing
+    numGames = first + len(seeds)
+    _parallelGames.update({'layout': layout, 'pacman': pacman, 'ghosts': ghosts, 'record': record,
+                           'catchExceptions': catchExceptions, 'timeout': timeout})
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = []
+        for result in pool.imap_unordered(_playGame, zip(range(first, numGames), seeds)):
+            print 'Game %d: %s Score: %d (%d moves)' % \
+                (result.index + 1, ['Pacman died!', 'Pacman emerges victorious!'][int(result.state.isWin())],
+                 result.state.getScore(), len(result.moveHistory))
+            results.append(result)
+    finally:
+        pool.terminate()
+        pool.join()
+        _parallelGames.clear()
+    results.sort(key=lambda result: result.index)
+    rules = ClassicGameRules(timeout)
+    return [result.toGame(rules, layout, pacman, ghosts, display, catchExceptions) for result in results]
+
+def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, workers=1 ):
+    """
+    Plays numGames games, one after another, and returns the Games after
+    training.  With workers > 1, only the training games are played here,
+    and the rest in that many processes (see runGamesInParallel), each
+    seeded with its own seed drawn from the random module once training
+    is over, so that any number of workers plays the same games.
+    """
     import __main__
     __main__.__dict__['_display'] = display
 
     rules = ClassicGameRules(timeout)
     games = []
 
-    for i in range( numGames ):
+    numHere = numGames
+    if workers > 1: numHere = min(numTraining, numGames)
+    for i in range( numHere ):
         beQuiet = i < numTraining
         if beQuiet:
                 # Suppress output and graphics
@@ -646,13 +814,12 @@ def runGames( layout, pacman, ghosts, display, numGames, record, numTraining = 0
         game.run()
         if not beQuiet: games.append(game)
 
-        if record:
-            import time, cPickle
-            fname = ('recorded-game-%d' % (i + 1)) +  '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = file(fname, 'w')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            cPickle.dump(components, f)
-            f.close()
+        if record: recordGame(layout, game, i)
+
+    if numHere < numGames:
+        seeds = [random.getrandbits(32) for i in range(numHere, numGames)]
+        games += runGamesInParallel(layout, pacman, ghosts, display, numHere, seeds, record,
+                                    catchExceptions, timeout, workers)
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]